@@ -0,0 +1,6 @@
+"""
+Benchmarks for the sed-apps tools. Run from the top of the repository:
+
+    python -m bench.run_bench --help
+    python -m bench.slow_fs --help
+"""
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Synthetic source files for benchmarking.
+
+Each generator takes a `size` (roughly the number of top-level units it
+emits) and a seeded `random.Random`, and returns a list of lines. The
+shapes follow the examples in the tools' own comments: Backbone-style views
+with `_domEvents` blocks and `initialize` methods, `goog.require` headers,
+stacked jsdoc blocks, and Python modules with imports, decorated methods,
+docstrings and multi-line `self.app.get` calls.
+"""
+import os
+import random
+
+
+def _name(rng, prefix):
+    return "%s%s%d" % (prefix, rng.choice('ABCDEFGH'), rng.randint(0, 9999))
+
+
+def backbone_view(size, rng):
+    namespace = "wgen.assess.%s.views" % _name(rng, 'mod').lower()
+    lines = [
+        "goog.provide('%s.View');" % namespace,
+        "",
+        "var Base = wgen.assess.common.views.Base;",
+        "",
+        "%s.View = Base.extend({" % namespace,
+        "    _domEvents : {",
+    ]
+    selectors = ["'click #%s' : '_on%sHandler'" %
+                 (_name(rng, 'el'), _name(rng, '')) for _ in range(4)]
+    lines += ["        %s," % sel for sel in selectors[:-1]]
+    lines += ["        %s" % selectors[-1], "    },", ""]
+    lines += [
+        "    _extendEvents : _.extend({}, Base.prototype._domEvents, {",
+        "        'change #dropdown' : '_changeHandler'",
+        "    }),",
+        "",
+        "    initialize : function (options) {",
+        "        this.options = options;",
+        "    },",
+        "",
+        "    delegateEvents : function (events) {",
+        "        Backbone.View.prototype.delegateEvents.call(this, events);",
+        "    },",
+        "",
+    ]
+    for i in range(size):
+        name = _name(rng, '_' if i % 3 == 0 else '')
+        lines += [
+            "    %s : function (a, b) {" % name,
+            "        var %sEvents = {" % name.strip('_'),
+            "            'click .%s' : '%sHandler'" % (_name(rng, 'c'), name),
+            "        };",
+            "        var total = a + b;",
+            "        return total * %d;" % i,
+            "    },",
+            "",
+        ]
+    lines += ["    last : function () {", "    }", "});", ""]
+    lines += ["%s.Helper = function () {" % namespace, "};"]
+    return lines
+
+
+def goog_requires(size, rng):
+    names = ["wgen.assess.%s.%s" % (_name(rng, 'pkg').lower(), _name(rng, 'C'))
+             for _ in range(size)]
+    names += rng.sample(names, max(1, size // 10))
+    rng.shuffle(names)
+    lines = ["goog.provide('wgen.assess.bench.Main');", ""]
+    lines += ["goog.require('%s');" % name for name in names]
+    lines += [""]
+    for name in names[:size]:
+        lines += ["var %s = %s;" % (name.rsplit('.', 1)[-1], name)]
+    return lines
+
+
+def jsdoc_heavy(size, rng):
+    lines = []
+    for i in range(size):
+        for _ in range(rng.randint(1, 4)):
+            lines += [
+                "/**",
+                " * %s" % _name(rng, 'Describes '),
+                " * @param {number} x",
+                " */",
+            ]
+            if rng.random() < 0.3:
+                lines.append("")
+        lines += ["function f%d(x) {" % i, "    return x;", "}", ""]
+    return lines
+
+
+def python_module(size, rng):
+    lines = [
+        "#!/usr/bin/env python",
+        "import os",
+        "import sys",
+        "from collections import defaultdict, namedtuple",
+        "",
+        "",
+        "class Test%s(object):" % _name(rng, ''),
+    ]
+    for i in range(size):
+        if i % 5 == 0:
+            lines.append("    @staticmethod")
+            lines.append("    def helper_%d(x):" % i)
+            lines.append("        return x")
+        else:
+            lines.append("    def test_%s(self):" % _name(rng, 'case').lower())
+            if i % 2:
+                lines.append('        """Check case %d"""' % i)
+            else:
+                lines += ['        """', '        Check case %d' % i,
+                          '        """']
+            lines += [
+                "        response = self.app.get('/api/%d', params={" % i,
+                "            'id': %d," % i,
+                "            'tags': ['a', 'b'],",
+                "        })",
+                "        self.assertEqual(response.status_int, 200)",
+            ]
+        lines.append("")
+    return lines
+
+
+CORPORA = {
+    'view': ('.js', backbone_view),
+    'requires': ('.js', goog_requires),
+    'jsdoc': ('.js', jsdoc_heavy),
+    'python': ('.py', python_module),
+}
+
+
+def generate(directory, kind, files, size, seed=0):
+    """ Write `files` files of corpus `kind` into `directory`; return paths """
+    extension, generator = CORPORA[kind]
+    rng = random.Random(seed)
+    paths = []
+    for i in range(files):
+        path = os.path.join(directory, "%s_%04d%s" % (kind, i, extension))
+        with open(path, 'w') as f:
+            f.write('\n'.join(generator(size, rng)) + '\n')
+        paths.append(path)
+    return paths
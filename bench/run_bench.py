@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+"""
+Benchmark every sed-apps tool against a synthetic corpus.
+
+For each tool a corpus of the kind it edits is generated into a temporary
+directory, and the tool's editor chain is run over it in a fresh process,
+timing each stage (load, match, apply, save) separately. The report gives
+lines per second, per-stage seconds and the peak RSS of that process; with
+--json it is also written as JSON, and --compare checks a run against such
+a file. No network access is needed.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+from bench.corpus import generate
+from src.cli import TOOL_NAMES, load_tool
+
+# tool name -> corpus kind it is benchmarked against
+CORPUS = {
+    'at-this': 'view',
+    'comment-merge': 'jsdoc',
+    'docstrings': 'python',
+    'events': 'view',
+    'extend-decl': 'view',
+    'inject-delegate-events': 'view',
+    'inject-private': 'view',
+    'move-events': 'view',
+    'quote-members': 'view',
+    'require-normalize': 'requires',
+    'require-sort': 'requires',
+    'revert-delegate-events': 'view',
+    'rewrite-app-get': 'python',
+    'python-func-debug': 'python',
+    'python-func-debug-ast': 'python',
+    'python-logging-injector': 'python',
+    'python-logging-injector-ast': 'python',
+}
+
+STAGES = ('load', 'match', 'apply', 'save')
+
+
+def bench_files(editor_classes, paths, mmap=False):
+    """ Run `editor_classes` over `paths`, timing each stage """
+    from src.common.file_state import FILES
+    from src.common.mapped import map_file
+
+    timings = dict.fromkeys(STAGES, 0.0)
+    total_lines = 0
+    for path in paths:
+        start = time.perf_counter()
+        state = map_file(path) if mmap else FILES.load(path)
+        total_lines += len(state.lines)
+        timings['load'] += time.perf_counter() - start
+        for editor_class in editor_classes:
+            editor = editor_class(path, state=state)
+            start = time.perf_counter()
+            found = editor.find_matches()
+            timings['match'] += time.perf_counter() - start
+            start = time.perf_counter()
+            editor.apply_matches(found)
+            editor.commit_edits()
+            timings['apply'] += time.perf_counter() - start
+        start = time.perf_counter()
+        FILES.save(state)
+        timings['save'] += time.perf_counter() - start
+    return total_lines, timings
+
+
+def bench_tool(name, options):
+    """ Benchmark one tool; meant to run in its own process """
+    kind = CORPUS[name]
+    result = {'tool': name, 'corpus': kind, 'error': None}
+    directory = tempfile.mkdtemp(prefix='sed-bench-')
+    try:
+        editor_classes = load_tool(name)
+        best = None
+        for _ in range(options.repeat):
+            paths = generate(directory, kind, options.files, options.size,
+                             options.seed)
+            total_lines, timings = bench_files(editor_classes, paths,
+                                               options.mmap)
+            if best is None or sum(timings.values()) < sum(best.values()):
+                best = timings
+        seconds = sum(best.values())
+        result.update(lines=total_lines, seconds=seconds, stages=best,
+                      lines_per_sec=total_lines / seconds if seconds else 0.0)
+    except Exception as e:  # pylint: disable=broad-except
+        result['error'] = "%s: %s" % (type(e).__name__, e)
+    finally:
+        shutil.rmtree(directory)
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result['peak_rss_kb'] = rss // 1024 if sys.platform == 'darwin' else rss
+    return result
+
+
+def _run_in_child(args):
+    name, options = args
+    return bench_tool(name, options)
+
+
+def compare(results, baseline_path, tolerance):
+    """ Report tools whose throughput fell more than `tolerance` """
+    with open(baseline_path) as f:
+        baseline = dict((r['tool'], r) for r in json.load(f)['results'])
+    regressions = 0
+    for result in results:
+        old = baseline.get(result['tool'])
+        if not old or old.get('error') or result['error']:
+            continue
+        if not old['lines_per_sec'] or not result['lines_per_sec']:
+            # An empty or instant run has no throughput to compare
+            print("%-24s %7s" % (result['tool'], 'n/a'))
+            continue
+        ratio = result['lines_per_sec'] / old['lines_per_sec']
+        flag = ''
+        if ratio < 1.0 - tolerance:
+            flag = '  REGRESSION'
+            regressions += 1
+        print("%-24s %6.2fx%s" % (result['tool'], ratio, flag))
+    return regressions
+
+
+def report(results):
+    header = "%-24s %8s %12s %10s" % ('tool', 'lines', 'lines/sec', 'rss(KB)')
+    header += ''.join(" %8s" % stage for stage in STAGES)
+    print(header)
+    for result in results:
+        if result['error']:
+            print("%-24s ERROR %s" % (result['tool'], result['error']))
+            continue
+        row = "%-24s %8d %12.0f %10d" % (
+            result['tool'], result['lines'], result['lines_per_sec'],
+            result['peak_rss_kb'])
+        row += ''.join(" %8.3f" % result['stages'][stage] for stage in STAGES)
+        print(row)
+
+
+def main():
+    names = TOOL_NAMES
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n')[0])
+    parser.add_argument('tools', nargs='*', metavar='TOOL',
+                        help='tools to run (default: all of %s)' %
+                             ', '.join(names))
+    parser.add_argument('--files', type=int, default=20,
+                        help='files per corpus (default: %(default)s)')
+    parser.add_argument('--size', type=int, default=200,
+                        help='units per file (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='runs per tool; the best is kept '
+                             '(default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mmap', action='store_true',
+                        help='load files memory-mapped')
+    parser.add_argument('--json', metavar='PATH', help='write results as JSON')
+    parser.add_argument('--compare', metavar='PATH',
+                        help='compare against a previous --json file')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='allowed slowdown for --compare '
+                             '(default: %(default)s)')
+    options = parser.parse_args()
+
+    unknown = set(options.tools) - set(names)
+    if unknown:
+        parser.error("unknown tools: %s" % ', '.join(sorted(unknown)))
+    tools = [name for name in names
+             if not options.tools or name in options.tools]
+
+    # The Python tools log every match at DEBUG level
+    logging.disable(logging.INFO)
+
+    # A fresh process per tool keeps peak RSS figures separate
+    results = []
+    for tool in tools:
+        pool = multiprocessing.Pool(1, maxtasksperchild=1)
+        try:
+            results.append(pool.apply(_run_in_child, ((tool, options),)))
+        finally:
+            pool.close()
+            pool.join()
+
+    report(results)
+    if options.json:
+        with open(options.json, 'w') as f:
+            json.dump({'options': vars(options), 'results': results}, f,
+                      indent=2, sort_keys=True)
+    if options.compare:
+        return 1 if compare(results, options.compare, options.tolerance) else 0
+    return 1 if any(result['error'] for result in results) else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+"""
+Compare the synchronous and --async drivers on a simulated slow file system.
+
+Network file systems make every open expensive. `slow_open` stands in for
+one locally: while it is active, each `open` of a file under a given
+directory sleeps for a fixed latency first, in this process and in any
+worker forked from it. A corpus is generated, a tool is run over a copy of
+it with and without --async, and the wall time of each run is reported;
+the edited trees must come out identical.
+
+    python -m bench.slow_fs --latency 0.01 quote-members
+"""
+import argparse
+import builtins
+import contextlib
+import filecmp
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from bench.corpus import generate
+from bench.run_bench import CORPUS
+from src.cli import TOOL_NAMES, load_tool
+from src.common.driver import build_parser, run
+
+
+@contextlib.contextmanager
+def slow_open(root, latency):
+    """ Delay every `open` of a path under `root` by `latency` seconds """
+    real_open = builtins.open
+    root = os.path.abspath(root) + os.sep
+
+    def open_(file, *args, **kwargs):
+        if isinstance(file, str) and os.path.abspath(file).startswith(root):
+            time.sleep(latency)
+        return real_open(file, *args, **kwargs)
+
+    builtins.open = open_
+    try:
+        yield
+    finally:
+        builtins.open = real_open
+
+
+def timed_run(editor_classes, directory, argv, latency):
+    options = build_parser().parse_args(argv + [directory])
+    with slow_open(directory, latency):
+        start = time.perf_counter()
+        status = run(editor_classes, options)
+        return status, time.perf_counter() - start
+
+
+def same_tree(left, right):
+    compared = filecmp.dircmp(left, right)
+    if compared.left_only or compared.right_only or compared.diff_files:
+        return False
+    return all(same_tree(os.path.join(left, d), os.path.join(right, d))
+               for d in compared.common_dirs)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n')[0])
+    parser.add_argument('tool', choices=TOOL_NAMES)
+    parser.add_argument('--files', type=int, default=200,
+                        help='files in the corpus (default: %(default)s)')
+    parser.add_argument('--size', type=int, default=20,
+                        help='units per file (default: %(default)s)')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='seconds added to every open '
+                             '(default: %(default)s)')
+    parser.add_argument('-j', '--jobs', type=int, default=1)
+    parser.add_argument('--window', type=int, default=32)
+    options = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    editor_classes = load_tool(options.tool)
+    top = tempfile.mkdtemp(prefix='sed-slow-fs-')
+    try:
+        corpus = os.path.join(top, 'corpus')
+        os.mkdir(corpus)
+        generate(corpus, CORPUS[options.tool], options.files, options.size)
+        jobs = ['-j', str(options.jobs)]
+        runs = [
+            ('sync', jobs),
+            ('async', jobs + ['--async', '--window', str(options.window)]),
+        ]
+        for name, argv in runs:
+            shutil.copytree(corpus, os.path.join(top, name))
+        for name, argv in runs:
+            status, seconds = timed_run(editor_classes,
+                                        os.path.join(top, name), argv,
+                                        options.latency)
+            print("%-6s %8.2fs  exit %d" % (name, seconds, status))
+        if not same_tree(os.path.join(top, 'sync'),
+                         os.path.join(top, 'async')):
+            print("MISMATCH: sync and async runs edited the files differently")
+            return 1
+    finally:
+        shutil.rmtree(top)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -2,6 +2,8 @@
 
 from setuptools import setup, find_packages
 
+from src import __version__
+
 
 def reqs_from_file(filename):
     with open(filename) as f:
@@ -11,7 +13,7 @@ def reqs_from_file(filename):
 
 setup(
     name='sed-apps',
-    version='0.1.3',
+    version=__version__,
     description='Suite of tools that use sed-engine',
     author='Hugh Brown',
     author_email='hughdbrown@yahoo.com',
@@ -25,11 +27,14 @@ setup(
     #    'src.javascript',
     #    'src.python',
     #],
-    packages=find_packages(),
+    packages=find_packages(exclude=['bench', 'bench.*', 'tests', 'tests.*']),
     zip_safe=False,
 
     entry_points={
         'console_scripts': [
+            # All tools, chained in one pass
+            'sed-apps = src.cli:main',
+
             # Python modifiers
             'sed-python-func-debug=src.python.sed_python_func_debug:main',
             'sed-python-logging-injector=src.python.sed_python_logging_injector:main',
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+"""
+sed-apps: run several tools over a tree in one pass.
+
+    sed-apps list
+    sed-apps run quote-members,inject-private,require-sort [options] PATH...
+
+The named tools are imported on demand and their editors chained, in the
+order given, into a single pipeline, so each file is loaded and written
+once for all of them. Options are those every sed-* tool takes, plus the
+options of the tools named -- --symbol-index for at-this, --check and
+--prune for require-normalize; see `sed-apps run TOOLS --help`.
+"""
+import importlib
+import sys
+
+from src.common.driver import build_parser, run
+
+# tool name -> (module, editor classes in the order the tool runs them,
+# and the module's (add options, build config) functions, if it has any)
+TOOLS = [
+    ('at-this', 'src.javascript.sed_at_this',
+     ['StreamEditorInjectNamespace', 'StreamEditorInjectContructor',
+      'StreamEditorInjectExtends'],
+     ('add_symbol_index_option', 'symbol_index_config')),
+    ('comment-merge', 'src.javascript.sed_comment_merge',
+     ['StreamEditorCommentMerge'], None),
+    ('docstrings', 'src.javascript.sed_docstrings',
+     ['StreamEditorDocstringSingle', 'StreamEditorDocstringMulti'], None),
+    ('events', 'src.javascript.sed_events',
+     ['StreamEditorModifyEventsWithinMethod'], None),
+    ('extend-decl', 'src.javascript.sed_extend_decl',
+     ['StreamEditorExtendEventsDecl'], None),
+    ('inject-delegate-events', 'src.javascript.sed_inject_delegate_events',
+     ['StreamEditorInjectDelegateEvents'], None),
+    ('inject-private', 'src.javascript.sed_inject_private',
+     ['StreamEditorInjectPrivate'], None),
+    ('move-events', 'src.javascript.sed_move_events',
+     ['StreamEditorMoveEvents'], None),
+    ('quote-members', 'src.javascript.sed_quote_members',
+     ['StreamEditorQuoteFunctions'], None),
+    ('require-sort', 'src.javascript.sed_require_sort',
+     ['StreamEditorSortGoogRequires'], None),
+    ('require-normalize', 'src.javascript.sed_require_sort',
+     ['StreamEditorNormalizeGoogRequires'],
+     ('add_check_options', 'normalize_config')),
+    ('revert-delegate-events', 'src.javascript.sed_revert_delegate_events',
+     ['StreamEditorRevertDelegateEvents'], None),
+    ('rewrite-app-get', 'src.javascript.sed_rewrite_app_get',
+     ['StreamEditorRewriteAppGet'], None),
+    ('python-func-debug', 'src.python.sed_python_func_debug',
+     ['StreamEditorInsertDebugAfterDef'], None),
+    ('python-func-debug-ast', 'src.python.sed_python_func_debug',
+     ['StreamEditorAstInsertDebugAfterDef'], None),
+    ('python-logging-injector', 'src.python.sed_python_logging_injector',
+     ['StreamEditorInjectLogging'], None),
+    ('python-logging-injector-ast', 'src.python.sed_python_logging_injector',
+     ['StreamEditorAstInjectLogging'], None),
+]
+
+TOOL_NAMES = [name for name, _, _, _ in TOOLS]
+
+
+def load_tool(name):
+    """ Import the module of tool `name` and return its editor classes """
+    return load_tool_options(name)[0]
+
+
+def load_tool_options(name):
+    """
+    Import the module of tool `name` and return its editor classes with
+    its (add options, build config) functions, or None
+    """
+    for tool, module_name, class_names, hooks in TOOLS:
+        if tool == name:
+            module = importlib.import_module(module_name)
+            editor_classes = [getattr(module, cls) for cls in class_names]
+            if hooks is not None:
+                hooks = tuple(getattr(module, hook) for hook in hooks)
+            return editor_classes, hooks
+    raise KeyError(name)
+
+
+def usage():
+    return __doc__.strip() + "\n\nTools: %s\n" % ', '.join(TOOL_NAMES)
+
+
+def main(argv=None):
+    """ Main entry point """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['list']:
+        sys.stdout.write('\n'.join(TOOL_NAMES) + '\n')
+        return 0
+    if argv[:1] != ['run'] or len(argv) < 2 or argv[1].startswith('-'):
+        sys.stderr.write(usage())
+        return 2
+
+    names = [name for name in argv[1].split(',') if name]
+    unknown = [name for name in names if name not in TOOL_NAMES]
+    if unknown:
+        sys.stderr.write("unknown tools: %s\n\n%s" %
+                         (', '.join(unknown), usage()))
+        return 2
+
+    tools = [(name,) + load_tool_options(name) for name in names]
+    parser = build_parser()
+    parser.prog = 'sed-apps run %s' % argv[1]
+    added = set()
+    for _, _, hooks in tools:
+        if hooks is not None and hooks[0] not in added:
+            hooks[0](parser)
+            added.add(hooks[0])
+    options = parser.parse_args(argv[2:])
+
+    editor_classes = []
+    labels = {}
+    config = {}
+    for name, tool_classes, hooks in tools:
+        for editor_class in tool_classes:
+            editor_classes.append(editor_class)
+            labels[editor_class.__name__] = name
+        if hooks is not None:
+            config.update(hooks[1](options, tool_classes))
+    return run(editor_classes, options, labels, config or None)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
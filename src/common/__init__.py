@@ -0,0 +1,20 @@
+"""
+Shared engine layer for the sed-apps tools.
+
+Editors subclass `StreamEditor` from here rather than `sed.engine` so that
+loading, matching and writing are owned by this package and can be chained.
+"""
+from sed.engine import (
+    ACCEPT, REJECT, NEXT, REPEAT,
+    ANY
+)
+
+from src.common.stream_editor import (
+    StreamEditor,
+    read_lines, write_lines
+)
+from src.common.pipeline import StreamEditorPipeline
+from src.common.driver import (
+    build_parser, run, option_files,
+    call_main
+)
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Asynchronous front end for source trees on slow or network file systems.
+
+On NFS the time goes into opening, reading and writing each file rather
+than into editing it. `run_async` overlaps that latency: up to `window`
+files are in flight at once, read and written by a thread pool, while the
+editing itself still happens in a pool of `jobs` worker processes (or in
+this process when `jobs` is 1). Workers get the file's contents and hand
+back the new contents; they never touch the file system.
+
+Results are reported as files complete, except that diffs are reported in
+the order of the file names, as with the synchronous driver. Either way no
+more than `window` files are held at once: in order, a file keeps its slot
+until its result has been reported. Streaming (`--stream`) does not apply:
+every file is edited in memory.
+"""
+import asyncio
+import collections
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.common.driver import _init_worker, _process_file, process_file
+from src.common.file_state import read_data, write_data
+
+
+def failed(filename, seconds):
+    """ The result of a file that could not be read or written """
+    return {'filename': filename, 'changed': False, 'diff': None,
+            'timings': {}, 'stats': {}, 'passes': 0, 'converged': True,
+            'error': traceback.format_exc(),
+            'seconds': seconds, 'cache': {}, 'profile': {}}
+
+
+async def process_all(pipeline, filenames, jobs, cache, window, report):
+    """ Edit `filenames` with `pipeline`, calling `report` on each result """
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(window)
+    ordered = pipeline.diff
+    io_pool = ThreadPoolExecutor(window)
+    cpu_pool = None
+    if jobs > 1:
+        cpu_pool = ProcessPoolExecutor(jobs, initializer=_init_worker,
+                                       initargs=(pipeline, cache))
+
+    async def edit(filename, data):
+        if cpu_pool is None:
+            return process_file(pipeline, filename, cache, data)
+        return await loop.run_in_executor(cpu_pool, _process_file,
+                                          filename, data)
+
+    async def one(filename):
+        start = time.perf_counter()
+        try:
+            try:
+                data = await loop.run_in_executor(io_pool, read_data, filename)
+            except OSError:
+                return failed(filename, time.perf_counter() - start)
+            result = await edit(filename, data)
+            output = result.pop('output', None)
+            if output is not None:
+                try:
+                    await loop.run_in_executor(io_pool, write_data,
+                                               filename, output,
+                                               pipeline.fsync)
+                except OSError:
+                    return failed(filename, time.perf_counter() - start)
+            return result
+        finally:
+            if not ordered:
+                slots.release()
+
+    def done(task):
+        running.discard(task)
+        report(task.result())
+
+    # In order: tasks awaiting their turn to be reported
+    pending = collections.deque()
+    # Otherwise: tasks not yet finished
+    running = set()
+
+    def report_pending():
+        while pending and pending[0].done():
+            report(pending.popleft().result())
+            slots.release()
+
+    try:
+        for filename in filenames:
+            if not pipeline.wants(filename):
+                # Nothing to read or write
+                report(process_file(pipeline, filename, cache))
+                continue
+            while ordered and slots.locked() and pending:
+                # Free the slots of results that are ready
+                await asyncio.wait([pending[0]])
+                report_pending()
+            await slots.acquire()
+            task = loop.create_task(one(filename))
+            if ordered:
+                pending.append(task)
+                report_pending()
+            else:
+                running.add(task)
+                task.add_done_callback(done)
+        while pending:
+            await asyncio.wait([pending[0]])
+            report_pending()
+        if running:
+            await asyncio.wait(list(running))
+    finally:
+        io_pool.shutdown()
+        if cpu_pool is not None:
+            cpu_pool.shutdown()
+
+
+def run_async(pipeline, filenames, jobs, cache, window, report):
+    asyncio.run(process_all(pipeline, filenames, jobs, cache, window, report))
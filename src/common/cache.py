@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+On-disk cache of per-file results, so that reruns skip files that an
+editor chain is known to leave unchanged.
+
+Entries map the digest of a file's content to the digest of the content the
+editor chain produced from it. An entry whose two digests are equal is a
+no-op, and a file with that content is not re-processed. The output of a
+change is recorded as a no-op too once a further pass has left it as it
+is, so that a file just rewritten under --fixed-point is skipped on the
+next run; the output of a single pass may still change on the next.
+
+One cache file is kept per editor chain, keyed on the editor classes, the
+code they run, the tool version and the config handed to the editors. A
+config value that is not plain data keys on its `cache_key` attribute
+instead.
+"""
+import hashlib
+import json
+import os
+import sys
+
+from src import __version__
+
+CACHE_DIR = '.sed-cache'
+
+# Every editor runs through these, whether or not it names them
+ENGINE_PACKAGES = ('src.common', 'sed.engine')
+# Top-level packages of the modules an editor may import from
+SOURCE_ROOTS = ('src', 'sed')
+
+
+def content_digest(text):
+    """ Digest of a file's text """
+    return hashlib.sha1(text.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+def package_paths(package):
+    """ Source files of every module of `package` """
+    paths = []
+    for directory in getattr(package, '__path__', ()):
+        paths.extend(os.path.join(directory, name)
+                     for name in os.listdir(directory)
+                     if name.endswith('.py'))
+    return paths
+
+
+def source_digest(editor_classes):
+    """
+    Digest of the code that decides what `editor_classes` do: the modules
+    defining them and their bases, the modules of this project and of
+    sed-engine they import from, and every module of this engine layer and
+    of sed-engine. Editing any of them invalidates the cache without a
+    version bump.
+    """
+    paths = set()
+    for name in ENGINE_PACKAGES:
+        if name in sys.modules:
+            paths.update(package_paths(sys.modules[name]))
+    modules = set()
+    for editor_class in editor_classes:
+        for cls in editor_class.__mro__:
+            module = sys.modules.get(cls.__module__)
+            if module is None:
+                continue
+            modules.add(module)
+            for value in vars(module).values():
+                name = getattr(value, '__module__', None)
+                if isinstance(name, str) and \
+                        name.split('.')[0] in SOURCE_ROOTS:
+                    modules.add(sys.modules.get(name))
+    for module in modules:
+        path = getattr(module, '__file__', None)
+        if path:
+            paths.add(path)
+    digest = hashlib.sha1()
+    for path in sorted(paths):
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def editor_key(editor_classes, config=None):
+    """ Identify an editor chain, its code and config and the tool version """
+    names = [cls.__name__ for cls in editor_classes]
+    key = "%s:%s:%s" % (__version__, ",".join(names),
+                        source_digest(editor_classes))
+    if config:
+        settings = sorted((name, getattr(value, 'cache_key', value))
+                          for name, value in config.items())
+        key += ":" + json.dumps(settings)
+    return key
+
+
+class ResultCache(object):
+    """
+    A snapshot of the cache for one editor chain plus the entries recorded
+    since it was loaded. Worker processes each hold a copy of the snapshot
+    and hand their new entries back to the parent with `pop_updates`.
+    """
+    def __init__(self, editor_classes, directory=CACHE_DIR, config=None):
+        self.key = editor_key(editor_classes, config)
+        digest = hashlib.sha1(self.key.encode('utf-8')).hexdigest()
+        self.path = os.path.join(directory, digest + '.json')
+        self.entries = {}
+        self.updates = {}
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (IOError, OSError, ValueError):
+            return self
+        if data.get('key') == self.key:
+            self.entries = data.get('entries', {})
+        return self
+
+    def is_noop(self, digest):
+        return self.entries.get(digest) == digest
+
+    def record(self, digest, output_digest, settled=False):
+        """
+        Record that the chain turns `digest` into `output_digest`; when
+        `settled`, a further pass left the output as it was
+        """
+        self.updates[digest] = output_digest
+        if settled:
+            self.updates[output_digest] = output_digest
+
+    def pop_updates(self):
+        updates, self.updates = self.updates, {}
+        return updates
+
+    def merge(self, updates):
+        self.entries.update(updates)
+
+    def save(self):
+        self.entries.update(self.pop_updates())
+        directory = os.path.dirname(self.path)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump({'key': self.key, 'entries': self.entries}, f)
+        os.rename(tmp_path, self.path)
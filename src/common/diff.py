@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Unified diffs of edited files, in the form `git apply` and `patch -p1`
+expect.
+
+The lines are diffed as the file stores them: with the file's own line
+ending, so that CRLF files keep their CRs, with the BOM on the first line,
+and with git's "\\ No newline at end of file" marker after a last line
+that has no line ending.
+"""
+import difflib
+import os
+
+from src.common.file_state import BOM, ENCODING
+
+NO_NEWLINE = '\\ No newline at end of file\n'
+
+
+def diff_path(filename):
+    """
+    Path used in the diff headers: relative to the working directory, or
+    the absolute path without its leading slash
+    """
+    path = os.path.relpath(filename)
+    if path.startswith(os.pardir):
+        path = os.path.abspath(filename)
+    return path.replace(os.sep, '/').lstrip('/')
+
+
+def stored_lines(state):
+    """ The lines of `state` with the line endings and BOM of the file """
+    lines = [line + state.newline for line in state.lines]
+    if lines and not state.final_newline:
+        lines[-1] = lines[-1][:-len(state.newline)]
+    if lines and state.encoding != ENCODING:
+        lines[0] = BOM.decode(ENCODING) + lines[0]
+    return lines
+
+
+def unified_diff(old, new, context=3):
+    """ Diff FileState `old` against `new` as text; '' if they are equal """
+    path = diff_path(old.filename)
+    text = []
+    for line in difflib.unified_diff(stored_lines(old), stored_lines(new),
+                                     'a/' + path, 'b/' + path, n=context):
+        text.append(line)
+        if not line.endswith('\n'):
+            text.append('\n' + NO_NEWLINE)
+    return ''.join(text)
@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+"""
+Command line driver shared by every sed-* console script.
+
+Files are independent of one another, so they are fanned out to a process
+pool (`--jobs`, defaulting to the CPU count). Each worker runs the editor
+pipeline on one file and reports back a small result record; the parent
+collects the records and prints aggregate statistics.
+"""
+import argparse
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+from src.common.cache import CACHE_DIR, ResultCache
+from src.common.file_state import ENCODING, ERRORS, fsync_directories
+from src.common.pipeline import MAX_PASSES, StreamEditorPipeline
+from src.common.profile import Profiler
+from src.common.walker import iter_files
+
+
+def build_parser(description=None):
+    """ Build the argument parser understood by `run` """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('filenames', nargs='*', metavar='PATH',
+                        help='files to edit in place, or directories to '
+                             'search for them')
+    parser.add_argument('-j', '--jobs', type=int,
+                        default=multiprocessing.cpu_count(),
+                        help='number of worker processes '
+                             '(default: %(default)s)')
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help='report every file processed')
+    parser.add_argument('-n', '--dryrun', action='store_true',
+                        help='do not write any files')
+    parser.add_argument('--include', action='append', default=[],
+                        metavar='GLOB',
+                        help='file names to edit under directories, or paths '
+                             'below them when GLOB has a slash (** spans '
+                             'directories); defaults to the tool\'s own '
+                             'extensions')
+    parser.add_argument('--exclude', action='append', default=[],
+                        metavar='GLOB',
+                        help='file or directory names, or paths as for '
+                             '--include, to skip')
+    parser.add_argument('--no-gitignore', dest='gitignore',
+                        action='store_false',
+                        help='do not honour .gitignore files')
+    parser.add_argument('--diff', action='store_true',
+                        help='write a unified diff to stdout instead of '
+                             'editing files (implies --dryrun)')
+    parser.add_argument('--fixed-point', action='store_true',
+                        help='rerun the tool over each file until it stops '
+                             'changing, for tools that converge')
+    parser.add_argument('--stream', action='store_true',
+                        help='edit line by line when the tool allows it')
+    parser.add_argument('--async', dest='async_io', action='store_true',
+                        help='read and write files concurrently, for slow '
+                             'or network file systems')
+    parser.add_argument('--window', type=int, default=32,
+                        help='files in flight with --async '
+                             '(default: %(default)s)')
+    parser.add_argument('--mmap', action='store_true',
+                        help='memory-map files and decode lines on demand')
+    parser.add_argument('--fsync', action='store_true',
+                        help='flush every file written, and the directories '
+                             'holding them, to disk')
+    parser.add_argument('--profile', action='store_true',
+                        help='report where the time went, ranked')
+    parser.add_argument('--cache', action='store_true',
+                        help='skip files known to be left unchanged')
+    parser.add_argument('--cache-dir', default=CACHE_DIR,
+                        help='cache location (default: %(default)s)')
+    return parser
+
+
+def process_file(pipeline, filename, cache=None, data=None):
+    """
+    Run `pipeline` on `filename`, or on its contents `data` when they have
+    already been read, capturing any error in the result
+    """
+    result = {'filename': filename, 'changed': False, 'diff': None,
+              'timings': {}, 'stats': {}, 'passes': 0, 'converged': True,
+              'error': None}
+    start = time.perf_counter()
+    try:
+        if data is None:
+            result.update(pipeline.process(filename, cache))
+        else:
+            result.update(pipeline.process_data(filename, data, cache))
+    except Exception:  # pylint: disable=broad-except
+        result['error'] = traceback.format_exc()
+    result['seconds'] = time.perf_counter() - start
+    result['cache'] = cache.pop_updates() if cache is not None else {}
+    profiler = pipeline.profiler
+    result['profile'] = profiler.pop_stats() if profiler is not None else {}
+    return result
+
+
+# Each pool worker receives the pipeline and cache snapshot once, at
+# start-up, rather than once per file.
+_WORKER = {}
+
+
+def _init_worker(pipeline, cache):
+    _WORKER.update(pipeline=pipeline, cache=cache)
+
+
+def _process_file(filename, data=None):
+    return process_file(_WORKER['pipeline'], filename, _WORKER['cache'], data)
+
+
+class RunStats(object):
+    """
+    Aggregate of the per-file results of one run. Editor timings and stats
+    are grouped under `labels` (editor class name -> label) when given.
+    With `fixed_point`, the total number of passes over the files is
+    reported, along with the most any one file took.
+    """
+    def __init__(self, labels=None, fixed_point=False):
+        self.files = 0
+        self.changed = 0
+        self.errors = 0
+        self.passes = 0
+        # (passes, filename) of the file that took the most
+        self.worst = (0, None)
+        self.seconds = 0.0
+        self.labels = labels or {}
+        self.fixed_point = fixed_point
+        self.timings = {}
+        self.stats = {}
+
+    def add(self, result):
+        self.files += 1
+        self.changed += bool(result['changed'])
+        self.errors += bool(result['error'])
+        self.passes += result['passes']
+        if result['passes'] > self.worst[0]:
+            self.worst = (result['passes'], result['filename'])
+        self.seconds += result['seconds']
+        for name, seconds in result['timings'].items():
+            label = self.labels.get(name, name)
+            self.timings[label] = self.timings.get(label, 0.0) + seconds
+        for name, counters in result['stats'].items():
+            totals = self.stats.setdefault(self.labels.get(name, name), {})
+            for key, count in counters.items():
+                totals[key] = totals.get(key, 0) + count
+
+    def report(self, elapsed):
+        text = "%d files, %d changed, %d errors in %.2fs (%.2fs cpu)\n" % \
+            (self.files, self.changed, self.errors, elapsed, self.seconds)
+        if self.fixed_point:
+            text += "%d passes" % self.passes
+            if self.worst[1] is not None:
+                text += ", at most %d on %s" % self.worst
+            text += "\n"
+        if len(self.timings) > 1:
+            for label, seconds in sorted(self.timings.items(),
+                                         key=lambda item: -item[1]):
+                text += "  %-32s %8.3fs\n" % (label, seconds)
+        for label, totals in sorted(self.stats.items()):
+            text += "  %-32s %s\n" % (label, ', '.join(
+                "%s %d" % item for item in sorted(totals.items())))
+        return text
+
+
+def iter_results(pipeline, filenames, jobs, cache=None):
+    """
+    Yield one result per filename, in a pool when that is worthwhile.
+    `filenames` may be a lazy iterable. Results come back in completion
+    order, except that diffs are kept in filename order.
+    """
+    filenames = iter(filenames)
+    first = list(itertools.islice(filenames, 2))
+    filenames = itertools.chain(first, filenames)
+    if jobs <= 1 or len(first) <= 1:
+        for filename in filenames:
+            yield process_file(pipeline, filename, cache)
+        return
+    chunksize = 8
+    pool = multiprocessing.Pool(jobs, _init_worker, (pipeline, cache))
+    imap = pool.imap if pipeline.diff else pool.imap_unordered
+    try:
+        for result in imap(_process_file, filenames, chunksize):
+            yield result
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def default_include(editor_classes):
+    """ Glob patterns for the extensions handled by `editor_classes` """
+    extensions = set()
+    for editor_class in editor_classes:
+        if not editor_class.extensions:
+            return ['*']
+        extensions.update(editor_class.extensions)
+    return ['*' + extension for extension in sorted(extensions)]
+
+
+def option_files(editor_classes, options):
+    """ The files named in `options` that `editor_classes` would edit """
+    return iter_files(
+        options.filenames,
+        include=options.include or default_include(editor_classes),
+        exclude=options.exclude, gitignore=options.gitignore)
+
+
+def run(editor_classes, options, labels=None, config=None):
+    """
+    Apply `editor_classes` to the files named in `options`. `labels` maps
+    editor class names to the names their timings are reported under;
+    `config` is handed to every editor.
+    """
+    if options.fixed_point:
+        diverging = [editor_class.__name__ for editor_class in editor_classes
+                     if not editor_class.converges]
+        if diverging:
+            sys.stderr.write("--fixed-point: %s would never stop changing "
+                             "files\n" % ', '.join(diverging))
+            return 2
+    filenames = option_files(editor_classes, options)
+    profiler = Profiler() if options.profile else None
+    pipeline = StreamEditorPipeline(editor_classes, verbose=options.verbose,
+                                    dryrun=options.dryrun or options.diff,
+                                    stream=options.stream,
+                                    profiler=profiler, diff=options.diff,
+                                    dispatch=not options.include,
+                                    mmap=options.mmap,
+                                    fixed_point=options.fixed_point,
+                                    config=config, fsync=options.fsync,
+                                    named=[path for path in options.filenames
+                                           if not os.path.isdir(path)])
+    cache = None
+    if options.cache:
+        cache = ResultCache(editor_classes, options.cache_dir,
+                            config).load()
+    stats = RunStats(labels, options.fixed_point)
+    # Directories of the files written, fsynced once at the end
+    written = set()
+    start = time.perf_counter()
+
+    def report(result):
+        stats.add(result)
+        if options.fsync and result['changed'] and not pipeline.dryrun:
+            written.add(os.path.dirname(os.path.realpath(result['filename'])))
+        if cache is not None:
+            cache.merge(result['cache'])
+        if profiler is not None:
+            profiler.merge(result['profile'])
+        if result['diff']:
+            # As bytes: the lines keep their CRs and undecodable bytes
+            sys.stdout.flush()
+            sys.stdout.buffer.write(result['diff'].encode(ENCODING, ERRORS))
+        if result['error']:
+            error = result['error'] if options.verbose else \
+                result['error'].splitlines()[-1] + "\n"
+            sys.stderr.write("*** %s: %s" % (result['filename'], error))
+        elif not result['converged']:
+            sys.stderr.write("*** %s: still changing after %d passes\n" % (
+                result['filename'], MAX_PASSES))
+        elif options.verbose:
+            sys.stderr.write("%s: %s\n" % (
+                result['filename'],
+                'changed' if result['changed'] else 'unchanged'))
+
+    if options.async_io:
+        from src.common.aio import run_async
+        run_async(pipeline, filenames, options.jobs, cache, options.window,
+                  report)
+    else:
+        for result in iter_results(pipeline, filenames, options.jobs, cache):
+            report(result)
+    fsync_directories(written)
+    if cache is not None:
+        cache.save()
+    sys.stderr.write(stats.report(time.perf_counter() - start))
+    if profiler is not None:
+        sys.stderr.write(profiler.report())
+    return 1 if stats.errors else 0
+
+
+def call_main(editor_classes, argv=None):
+    """
+    Standard main entry point: apply `editor_classes` (one class or a
+    sequence of classes, run as a single pipeline) to the command line files.
+    """
+    if isinstance(editor_classes, type):
+        editor_classes = [editor_classes]
+    options = build_parser().parse_args(argv)
+    return run(editor_classes, options)
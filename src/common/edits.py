@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Deferred edits.
+
+Splicing a Python list costs O(n) per edit, so an editor that inserts at
+every function header is quadratic in the size of the file. An `EditLog`
+instead records each edit against the original line numbers and builds the
+edited file in a single pass once all matches have been applied. Because
+the original lines are never touched, `apply_match` can use line numbers
+from matches and `find_line` without accounting for earlier edits.
+"""
+
+
+class EditLog(object):
+    def __init__(self):
+        self.edits = []
+
+    def __len__(self):
+        return len(self.edits)
+
+    def replace(self, start, end, new_lines):
+        """ Record that original lines [start, end) become `new_lines` """
+        self.edits.append((start, end, list(new_lines), len(self.edits)))
+
+    def apply(self, lines):
+        """
+        Return a new list with every recorded edit applied to `lines`.
+
+        Insertions at the same position come out in reverse order of
+        recording and before a replacement starting there, which is what
+        applying the same edits immediately, last match first, produces.
+        Overlapping replacements, and insertions strictly inside a replaced
+        range, are ambiguous and raise ValueError.
+        """
+        def key(edit):
+            start, end, _, seq = edit
+            return start, start != end, -seq
+
+        result = []
+        pos = 0
+        for start, end, new_lines, _ in sorted(self.edits, key=key):
+            if start < pos:
+                raise ValueError("overlapping edits at line %d" % start)
+            result.extend(lines[pos:start])
+            result.extend(new_lines)
+            pos = end
+        result.extend(lines[pos:])
+        return result
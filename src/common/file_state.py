@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+"""
+Loaded file state shared by every editor that works on a file.
+
+A `FileState` holds the decoded lines of one file together with what is
+needed to write them back unchanged -- the line ending, whether the last
+line was terminated, the encoding -- and the data derived from the lines
+(the `LineIndex`, the javascript brace structure, ...), so that editors
+chained over the file share one load and one copy of each index.
+
+`FILES` is the process-wide `FileCache`: states keyed by absolute path and
+checked against the file's mtime and size, evicted least recently used
+once their total size passes a bound. A state written back through the
+cache stays current, so a file edited again in the same process is
+neither re-read nor re-split.
+
+Files are written by replacing them: the new contents go to a temporary
+file in the same directory, which is renamed over the original. A reader
+sees either the old file or the new one, never a partial write.
+"""
+import os
+import shutil
+import tempfile
+from collections import OrderedDict
+
+ENCODING = 'utf-8'
+# Undecodable bytes survive a load and save unchanged
+ERRORS = 'surrogateescape'
+BOM = b'\xef\xbb\xbf'
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+# Read size of `scan_layout`
+CHUNK_SIZE = 64 * 1024
+
+
+def file_stamp(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def read_data(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def write_data(path, data, fsync=False):
+    """
+    Atomically replace the contents of `path`, keeping its mode. With
+    `fsync`, the data is on disk before the rename; making the rename
+    itself durable is left to `fsync_directories`.
+    """
+    path = os.path.realpath(path)
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % name)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        shutil.copymode(path, tmp_path)
+        os.rename(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def scan_layout(f, chunk_size=CHUNK_SIZE):
+    """
+    (encoding, newline, final_newline) of the binary file `f` by the rules
+    of `FileState.decode`, read a chunk at a time. `f` is left at the
+    start of the text, after any BOM.
+    """
+    encoding = ENCODING
+    if f.read(len(BOM)) == BOM:
+        encoding = 'utf-8-sig'
+    else:
+        f.seek(0)
+    start = f.tell()
+    count = crlf = 0
+    last = b''
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        count += chunk.count(b'\n')
+        crlf += chunk.count(b'\r\n')
+        if last == b'\r' and chunk.startswith(b'\n'):
+            crlf += 1
+        last = chunk[-1:]
+    f.seek(start)
+    newline = '\r\n' if count and crlf == count else '\n'
+    return encoding, newline, last in (b'', b'\n')
+
+
+def fsync_directories(directories):
+    """ Flush the directory entries of files renamed into `directories` """
+    for directory in sorted(directories):
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+class FileState(object):
+    def __init__(self, filename, lines, newline='\n', final_newline=True,
+                 encoding=ENCODING, stamp=None):
+        self.filename = filename
+        self.lines = lines
+        self.newline = newline
+        self.final_newline = final_newline
+        self.encoding = encoding
+        # (mtime_ns, size) of the file the lines were read from or saved to
+        self.stamp = stamp
+        # Bumped on every edit to `lines`; see `derive`
+        self.version = 0
+        # `LineIndex` of `lines`, kept current by the editors' range edits
+        self.index = None
+        self.derived = {}
+
+    @classmethod
+    def decode(cls, filename, data, stamp=None):
+        encoding = ENCODING
+        if data.startswith(BOM):
+            encoding, data = 'utf-8-sig', data[len(BOM):]
+        text = data.decode(ENCODING, ERRORS)
+        count = text.count('\n')
+        newline = '\r\n' if count and text.count('\r\n') == count else '\n'
+        lines = text.split(newline)
+        final_newline = not lines[-1]
+        if final_newline:
+            lines.pop()
+        return cls(filename, lines, newline, final_newline, encoding, stamp)
+
+    def text(self):
+        text = self.newline.join(self.lines)
+        if self.lines and self.final_newline:
+            text += self.newline
+        return text
+
+    def encode(self):
+        data = self.text().encode(ENCODING, ERRORS)
+        return BOM + data if self.encoding == 'utf-8-sig' else data
+
+    def copy(self):
+        """
+        A state with its own copy of the lines and nothing derived. Lines
+        that are not a list are never edited in place and are shared.
+        """
+        lines = self.lines
+        if isinstance(lines, list):
+            lines = list(lines)
+        return FileState(self.filename, lines, self.newline,
+                         self.final_newline, self.encoding, self.stamp)
+
+    def derive(self, name, build):
+        """
+        `build(self.lines)`, computed once and reused until the lines are
+        edited or replaced.
+        """
+        entry = self.derived.get(name)
+        if entry is None or entry[0] is not self.lines or \
+                entry[1] != self.version:
+            entry = self.derived[name] = \
+                (self.lines, self.version, build(self.lines))
+        return entry[2]
+
+
+class FileCache(object):
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.states = OrderedDict()
+        self.size = 0
+
+    def load(self, filename, accept=None):
+        """
+        The state of `filename`, read only if it changed on disk. When it
+        is read and `accept` is given, the raw bytes are passed to it first
+        and None is returned, with nothing decoded, if it returns False.
+        """
+        path = os.path.abspath(filename)
+        stamp = file_stamp(path)
+        state = self.states.get(path)
+        if state is not None and state.stamp == stamp:
+            self.states.move_to_end(path)
+            return state
+        data = read_data(path)
+        if accept is not None and not accept(data):
+            return None
+        state = FileState.decode(filename, data, stamp)
+        self._put(path, state)
+        return state
+
+    def save(self, state, fsync=False):
+        """ Write `state` to its file and keep it as the current state """
+        path = os.path.abspath(state.filename)
+        # Encoded before the file is replaced: the lines may be mapped
+        data = state.encode()
+        write_data(path, data, fsync)
+        # `state` may be the cached entry: drop it at the size it was kept at
+        self.discard(path)
+        state.stamp = file_stamp(path)
+        self._put(path, state)
+
+    def discard(self, filename):
+        state = self.states.pop(os.path.abspath(filename), None)
+        if state is not None:
+            self.size -= state.stamp[1]
+
+    def clear(self):
+        self.states.clear()
+        self.size = 0
+
+    def _put(self, path, state):
+        self.discard(path)
+        self.states[path] = state
+        self.size += state.stamp[1]
+        while self.size > self.max_bytes and len(self.states) > 1:
+            _, evicted = self.states.popitem(last=False)
+            self.size -= evicted.stamp[1]
+
+
+FILES = FileCache()
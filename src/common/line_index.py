@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+"""
+Index of the lines matching each regex an editor looks up.
+
+`find_line` is typically called once per match from `apply_match`, which
+makes a full scan per call quadratic on large files. The index scans the
+file once per distinct regex, keeps the sorted line numbers of its hits,
+and is kept current by `replace`, which every range edit goes through:
+only the replaced lines are re-matched and later hits are shifted.
+"""
+from bisect import bisect_left
+
+
+class LineIndex(object):
+    def __init__(self, lines, match):
+        self.lines = lines
+        self.match = match
+        self.hits = {}
+
+    def lookup(self, regex):
+        """ Sorted line numbers of the lines matching `regex` """
+        hits = self.hits.get(regex)
+        if hits is None:
+            hits = self.hits[regex] = self._scan(regex, 0, len(self.lines))
+        return hits
+
+    def first(self, regex, start=0):
+        """ First line number at or after `start` matching `regex`, or None """
+        hits = self.lookup(regex)
+        i = bisect_left(hits, start)
+        return hits[i] if i < len(hits) else None
+
+    def replace(self, start, end, count):
+        """
+        Account for lines[start:end] having been replaced by `count` lines.
+        """
+        delta = count - (end - start)
+        for regex, hits in self.hits.items():
+            i = bisect_left(hits, start)
+            j = bisect_left(hits, end)
+            hits[i:] = self._scan(regex, start, start + count) + \
+                [line_no + delta for line_no in hits[j:]]
+
+    def clear(self):
+        self.hits.clear()
+
+    def _scan(self, regex, start, end):
+        match, lines = self.match, self.lines
+        return [line_no for line_no in range(start, end)
+                if match(regex, lines[line_no]) is not None]
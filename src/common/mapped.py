@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+Memory-mapped line loading for very large inputs.
+
+`MappedLines` is a read-only sequence of the lines of a memory-mapped file.
+It keeps only the byte offset of each line start, in an `array`, and
+decodes a line when it is indexed, so a large bundle costs a few bytes per
+line until something edits it. `scan` goes further for editors with
+`keywords`: it searches the mapped bytes for the keywords directly and
+decodes only the lines it lands on.
+
+Editors never edit a `MappedLines` in place: the first range edit turns the
+lines into a list (see `StreamEditor.replace_range`), and batched edits
+build a new list when they are applied.
+"""
+import mmap
+from array import array
+from bisect import bisect_right
+
+from src.common.file_state import BOM, ENCODING, ERRORS, FileState, file_stamp
+
+
+class MappedLines(object):
+    def __init__(self, data, start=0):
+        self.data = data
+        size = len(data)
+        # Offsets of line starts, then one past the end of the last line's
+        # terminator, so line i is data[offsets[i]:offsets[i + 1] - 1],
+        # less the \r of a CRLF file
+        self.offsets = array('I' if size < 2 ** 32 - 1 else 'Q', [start])
+        append, find = self.offsets.append, data.find
+        crlf = 0
+        pos = data.find(b'\n', start)
+        while pos >= 0:
+            append(pos + 1)
+            crlf += pos > start and data[pos - 1] == 13
+            pos = find(b'\n', pos + 1)
+        # As in `FileState.decode`: CRLF only if every newline is one
+        count = len(self.offsets) - 1
+        self.newline = '\r\n' if count and crlf == count else '\n'
+        self.terminator = len(self.newline)
+        self.final_newline = self.offsets[-1] == size
+        if not self.final_newline:
+            append(size + self.terminator)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def line(self, line_no):
+        offsets = self.offsets
+        end = offsets[line_no + 1] - self.terminator
+        return self.data[offsets[line_no]:end].decode(ENCODING, ERRORS)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.line(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("line index out of range")
+        return self.line(index)
+
+    def __iter__(self):
+        for line_no in range(len(self)):
+            yield self.line(line_no)
+
+    def scan(self, keywords, skipping):
+        """
+        Yield (line_no, line) for every line, except that while `skipping()`
+        is true, lines containing none of `keywords` are passed over
+        without being decoded.
+        """
+        data, offsets = self.data, self.offsets
+        keywords = [keyword.encode(ENCODING) for keyword in keywords]
+        # Next known position of each keyword, -1 once it has run out
+        hits = dict.fromkeys(keywords, 0)
+        line_no, count = 0, len(self)
+        while line_no < count:
+            if skipping():
+                start = offsets[line_no]
+                for keyword, pos in hits.items():
+                    if 0 <= pos < start:
+                        hits[keyword] = data.find(keyword, start)
+                found = [pos for pos in hits.values() if pos >= 0]
+                if not found:
+                    return
+                line_no = bisect_right(offsets, min(found)) - 1
+            yield line_no, self.line(line_no)
+            line_no += 1
+
+
+def map_file(filename, accept=None):
+    """
+    A `FileState` of `filename` whose lines are a `MappedLines`. Empty files
+    cannot be mapped and are read as usual. As with `FileCache.load`, None
+    is returned if `accept` rejects the mapped bytes.
+    """
+    stamp = file_stamp(filename)
+    with open(filename, 'rb') as f:
+        if not stamp[1]:
+            data = f.read()
+            if accept is not None and not accept(data):
+                return None
+            return FileState.decode(filename, data, stamp)
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if accept is not None and not accept(data):
+        data.close()
+        return None
+    bom = data[:len(BOM)] == BOM
+    lines = MappedLines(data, len(BOM) if bom else 0)
+    return FileState(filename, lines, newline=lines.newline,
+                     final_newline=lines.final_newline,
+                     encoding='utf-8-sig' if bom else ENCODING, stamp=stamp)
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+"""
+Compact record of one matched line.
+
+The table matcher used to keep a dict per matched line -- the regex's
+`groupdict()` plus "line_no". A `MatchRecord` keeps the `re` match object
+and the line number instead, and reads group values out of the match only
+when they are asked for. It is a read-only mapping with the same keys as
+the dict it replaces, so `match["line_no"]`, `match.get(...)`, `"x" in
+match`, `FMT % match` and `"{0[x]}".format(match)` all work unchanged.
+"""
+from collections.abc import Mapping
+
+
+class MatchRecord(Mapping):
+    __slots__ = ('match', 'line_no')
+
+    def __init__(self, match, line_no):
+        # None for a line matched by ANY, which captures nothing
+        self.match = match
+        self.line_no = line_no
+
+    def _names(self):
+        return self.match.re.groupindex if self.match is not None else {}
+
+    def __getitem__(self, key):
+        if key == 'line_no':
+            return self.line_no
+        try:
+            return self.match.group(key)
+        except (IndexError, AttributeError):
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key == 'line_no':
+            return self.line_no
+        try:
+            return self.match.group(key)
+        except (IndexError, AttributeError):
+            return default
+
+    def __contains__(self, key):
+        return key == 'line_no' or key in self._names()
+
+    def __iter__(self):
+        for name in self._names():
+            yield name
+        yield 'line_no'
+
+    def __len__(self):
+        return len(self._names()) + 1
+
+    def __repr__(self):
+        return repr(dict(self.items()))
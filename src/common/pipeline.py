@@ -0,0 +1,223 @@
+#!/usr/bin/env python
+"""
+Run an ordered chain of stream editors over each file with a single load
+and a single write. The editors share the file's `FileState`, and with it
+the indexes built over its lines.
+"""
+import time
+
+from src.common.cache import content_digest
+from src.common.diff import unified_diff
+from src.common.file_state import ENCODING, FILES, FileState
+from src.common.mapped import map_file
+from src.common.streaming import stream_file
+
+
+# Bound on --fixed-point passes, in case edits never settle
+MAX_PASSES = 20
+
+
+def same_lines(before, after):
+    if isinstance(before, list) and isinstance(after, list):
+        return before == after
+    return len(before) == len(after) and \
+        all(a == b for a, b in zip(before, after))
+
+
+def new_outcome():
+    return {'changed': False, 'diff': None, 'timings': {}, 'stats': {},
+            'converged': True}
+
+
+class StreamEditorPipeline(object):
+    """
+    Each editor class in `editor_classes` is run in order against the lines
+    left behind by the previous one. The file is read once before the first
+    editor and written once after the last, and only if its content
+    changed: edits that cancel out leave the file, and its mtime, alone.
+
+    With `stream`, a chain of a single streamable editor is run line by line
+    instead; streamed files bypass the result cache. With a `profiler`,
+    editors and file I/O are instrumented. With `diff`, a unified diff of
+    each changed file is produced from the text already in memory. With
+    `dispatch`, each editor only sees the files its `extensions` cover,
+    except for the files in `named`, which every editor sees: a file named
+    on the command line is edited whatever its extension.
+    With `mmap`, files are memory-mapped and lines are decoded on demand;
+    mapped files bypass the process file cache until they are written.
+    With `fixed_point`, the chain is run over each file again until a pass
+    leaves it unchanged. Every editor is given `config`. With `fsync`,
+    each file written is flushed to disk before it replaces the original.
+
+    A file is rejected before it is decoded, with a `find` per keyword over
+    its raw bytes, when every editor that applies to it declares `keywords`
+    and the file contains none of them. Streamed files are not rejected.
+    """
+    def __init__(self, editor_classes, verbose=False, dryrun=False,
+                 stream=False, profiler=None, diff=False, dispatch=True,
+                 mmap=False, fixed_point=False, config=None, fsync=False,
+                 named=()):
+        self.editor_classes = list(editor_classes)
+        self.named = frozenset(named)
+        self.fsync = fsync
+        self.config = config
+        self.mmap = mmap
+        self.fixed_point = fixed_point
+        self.dispatch = dispatch
+        self.verbose = verbose
+        self.dryrun = dryrun
+        self.profiler = profiler
+        self.diff = diff
+        self.stream = stream and not diff and not fixed_point and \
+            len(self.editor_classes) == 1 and \
+            self.editor_classes[0].streamable
+
+    def edit(self, state, timings=None, stats=None):
+        """
+        Run the chain over the lines of `state`, editing it in place; return
+        True if anything changed. The seconds spent in each editor are added
+        to `timings`, and its `stats` counters to `stats`, keyed by class
+        name.
+        """
+        filename = state.filename
+        changed = False
+        for editor_class in self.editor_classes:
+            if not self.applies(editor_class, filename):
+                continue
+            start = time.perf_counter()
+            editor = editor_class(filename, verbose=self.verbose,
+                                  dryrun=self.dryrun, profiler=self.profiler,
+                                  state=state, config=self.config)
+            changed = editor.run() or changed
+            seconds = time.perf_counter() - start
+            name = editor_class.__name__
+            if timings is not None:
+                timings[name] = timings.get(name, 0.0) + seconds
+            if stats is not None and editor.stats:
+                counters = stats.setdefault(name, {})
+                for key, count in editor.stats.items():
+                    counters[key] = counters.get(key, 0) + count
+        return changed
+
+    def applies(self, editor_class, filename):
+        """ True if `editor_class` is to be run on `filename` """
+        return not self.dispatch or filename in self.named or \
+            editor_class.handles(filename)
+
+    def wants(self, filename):
+        """ True if some editor in the chain applies to `filename` """
+        return any(self.applies(editor_class, filename)
+                   for editor_class in self.editor_classes)
+
+    def needles(self, filename):
+        """
+        The encoded keywords at least one of which `filename` must contain
+        for the chain to edit it, or None if it could edit it regardless
+        """
+        needles = set()
+        for editor_class in self.editor_classes:
+            if not self.applies(editor_class, filename):
+                continue
+            if not editor_class.keywords:
+                return None
+            needles.update(keyword.encode(ENCODING)
+                           for keyword in editor_class.keywords)
+        return needles
+
+    def acceptor(self, filename):
+        """ A test of the raw bytes of `filename`, or None to read it all """
+        needles = self.needles(filename)
+        if needles is None:
+            return None
+        return lambda data: any(data.find(needle) >= 0 for needle in needles)
+
+    def process(self, filename, cache=None):
+        """
+        Edit `filename` in place and return a dict with "changed", the
+        per-editor "timings" and, when diffs are wanted, "diff". With a
+        `ResultCache`, files whose content is a known no-op are skipped and
+        the outcome for every other file is recorded.
+        """
+        outcome = new_outcome()
+        if not self.wants(filename):
+            return outcome
+        if self.stream:
+            outcome['changed'] = stream_file(
+                self.editor_classes[0], filename, verbose=self.verbose,
+                dryrun=self.dryrun, profiler=self.profiler,
+                fsync=self.fsync)
+            return outcome
+        state = self._io('read', map_file if self.mmap else FILES.load,
+                         filename, self.acceptor(filename))
+        if state is None:
+            return outcome
+        try:
+            outcome, edited = self.edit_state(state, cache)
+            if outcome['changed'] and not self.dryrun:
+                self._io('write', FILES.save, edited, self.fsync)
+        except Exception:
+            FILES.discard(filename)
+            raise
+        return outcome
+
+    def process_data(self, filename, data, cache=None):
+        """
+        `process` for a file whose contents have already been read into
+        `data`. Nothing is written: when the file changed, its new contents
+        are returned as "output".
+        """
+        accept = self.acceptor(filename)
+        if not self.wants(filename) or accept is not None and not accept(data):
+            return new_outcome()
+        outcome, edited = self.edit_state(FileState.decode(filename, data),
+                                          cache)
+        if outcome['changed'] and not self.dryrun:
+            outcome['output'] = edited.encode()
+        return outcome
+
+    def edit_state(self, state, cache=None):
+        """
+        Run the chain over `state` and return the outcome together with the
+        edited state, which is a copy on a dry run: the state passed in may
+        be the cached image of the file on disk.
+        """
+        outcome = new_outcome()
+        digest = None
+        if cache is not None:
+            digest = content_digest(state.text())
+            if cache.is_noop(digest):
+                return outcome, state
+        edited = state.copy() if self.dryrun else state
+        # Kept to compare against: a list is edited in place
+        before = state.lines
+        if edited is state and isinstance(before, list):
+            before = list(before)
+        changed = False
+        passes = 0
+        while passes < (MAX_PASSES if self.fixed_point else 1):
+            passes += 1
+            if not self.edit(edited, outcome['timings'], outcome['stats']):
+                break
+            changed = True
+        else:
+            # The last pass still changed something
+            outcome['converged'] = not self.fixed_point
+        if changed and same_lines(before, edited.lines):
+            # Edits that cancel out: nothing to write
+            changed = False
+        outcome['passes'] = passes
+        if changed and self.diff:
+            outcome['diff'] = unified_diff(state, edited)
+        if cache is not None:
+            # Under --fixed-point, a settled file's last pass changed nothing
+            cache.record(digest, content_digest(edited.text()) if changed
+                         else digest,
+                         settled=self.fixed_point and outcome['converged'])
+        outcome['changed'] = changed
+        return outcome, edited
+
+    def _io(self, detail, function, *args):
+        if self.profiler is None:
+            return function(*args)
+        with self.profiler.timer(('io', '', detail)):
+            return function(*args)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+Per-table prefilters.
+
+Trying every regex of a state against every line is the hot loop of every
+tool, and most lines match nothing. Each row of a table with more than one
+transition is compiled once into a single alternation of its patterns, with
+named groups stripped, so a line that cannot take any transition is
+rejected by one regex call. The individual regexes are only tried -- for
+their groups -- once the alternation has matched.
+"""
+import re
+
+from sed.engine import ANY
+
+NAMED_GROUP = re.compile(r'\(\?P<\w+>')
+
+# Compiled rows keyed by id(table); the table itself is kept alive in the
+# value so that the id cannot be reused.
+_COMPILED = {}
+
+
+def combine(regexes):
+    """
+    Compile `regexes` into one alternation, or return None when they cannot
+    be combined (ANY, mixed flags, backreferences or a single regex).
+    """
+    if len(regexes) < 2 or any(regex is ANY for regex in regexes):
+        return None
+    flags = set(regex.flags for regex in regexes)
+    if len(flags) != 1:
+        return None
+    flags = flags.pop()
+    # A trailing newline closes any VERBOSE comment before the paren
+    end = '\n)' if flags & re.VERBOSE else ')'
+    parts = []
+    for regex in regexes:
+        if '(?P=' in regex.pattern:
+            return None
+        parts.append('(?:' + NAMED_GROUP.sub('(?:', regex.pattern) + end)
+    try:
+        return re.compile('|'.join(parts), flags)
+    except re.error:
+        return None
+
+
+def compile_table(table):
+    """
+    Return [(prefilter, row), ...] for `table`, where prefilter is a
+    compiled alternation of the row's regexes or None.
+    """
+    key = id(table)
+    if key not in _COMPILED:
+        rows = [(combine([regex for regex, _ in row]), row) for row in table]
+        _COMPILED[key] = (table, rows)
+    return _COMPILED[key][1]
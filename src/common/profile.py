@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+"""
+Instrumentation for `--profile`.
+
+A `Profiler` accumulates, per key, the number of attempts, the number of
+hits and the time spent. Keys are (kind, editor, detail) triples of strings:
+
+    ('match', 'StreamEditorX', '[1] SELECTOR')   a table regex in state 1
+    ('prefilter', 'StreamEditorX', '[1]')         a row's combined prefilter
+    ('apply_match', 'StreamEditorX', '')
+    ('find_line', 'StreamEditorX', 'INITIALIZE_MATCH')
+    ('io', '', 'read')
+
+Time spent in `find_line` is also counted in the `apply_match` that called
+it, so the report's percentages are of the total without it. Table regexes
+are profiled by wrapping them, so the unprofiled path pays nothing. Stats
+are plain dicts so that pool workers can hand them back to the parent
+process to be merged.
+"""
+import sys
+import time
+from contextlib import contextmanager
+
+from sed.engine import ANY
+
+# Kinds whose time is already counted in an enclosing entry
+NESTED = frozenset(['find_line'])
+
+
+def regex_name(regex, module_name):
+    """ The module-level name bound to `regex`, or a compact pattern """
+    module = sys.modules.get(module_name)
+    for name, value in vars(module).items() if module else ():
+        if value is regex and name.isupper():
+            return name
+    pattern = ' '.join(getattr(regex, 'pattern', repr(regex)).split())
+    return pattern[:40]
+
+
+class ProfiledRegex(object):
+    """ Stand-in for a compiled regex that records its `match` calls """
+    def __init__(self, regex, entry):
+        self.regex = regex
+        self.entry = entry
+        self.pattern = regex.pattern
+        self.flags = regex.flags
+
+    def match(self, line):
+        start = time.perf_counter()
+        m = self.regex.match(line)
+        entry = self.entry
+        entry[0] += 1
+        entry[1] += m is not None
+        entry[2] += time.perf_counter() - start
+        return m
+
+
+class Profiler(object):
+    def __init__(self):
+        self.stats = {}
+        self.names = {}
+
+    def name(self, regex, module_name):
+        """ `regex_name`, cached """
+        key = id(regex), module_name
+        if key not in self.names:
+            self.names[key] = regex_name(regex, module_name)
+        return self.names[key]
+
+    def entry(self, key):
+        """ The [attempts, hits, seconds] list for `key` """
+        return self.stats.setdefault(key, [0, 0, 0.0])
+
+    def add(self, key, seconds, hit=True):
+        entry = self.entry(key)
+        entry[0] += 1
+        entry[1] += bool(hit)
+        entry[2] += seconds
+
+    @contextmanager
+    def timer(self, key):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(key, time.perf_counter() - start)
+
+    def instrument_rows(self, editor_class, rows):
+        """ Wrap the regexes of compiled table `rows` for `editor_class` """
+        name, module = editor_class.__name__, editor_class.__module__
+        instrumented = []
+        for state, (prefilter, row) in enumerate(rows):
+            if prefilter is not None:
+                key = ('prefilter', name, '[%d]' % state)
+                prefilter = ProfiledRegex(prefilter, self.entry(key))
+            wrapped = []
+            for regex, action in row:
+                if regex is not ANY:
+                    key = ('match', name,
+                           '[%d] %s' % (state, self.name(regex, module)))
+                    regex = ProfiledRegex(regex, self.entry(key))
+                wrapped.append([regex, action])
+            instrumented.append((prefilter, wrapped))
+        return instrumented
+
+    def pop_stats(self):
+        stats, self.stats = self.stats, {}
+        return stats
+
+    def merge(self, stats):
+        for key, (attempts, hits, seconds) in stats.items():
+            entry = self.entry(key)
+            entry[0] += attempts
+            entry[1] += hits
+            entry[2] += seconds
+
+    def report(self, limit=40):
+        """
+        The stats ranked by time, as text. Percentages are of the time not
+        nested in another entry, so those of the other kinds add up to 100.
+        """
+        total = sum(entry[2] for (kind, _, _), entry in self.stats.items()
+                    if kind not in NESTED) or 1.0
+        lines = ["%9s %6s %10s %10s %6s  %s" % (
+            'seconds', '%', 'attempts', 'hits', 'hit%', 'where')]
+        ranked = sorted(self.stats.items(), key=lambda item: -item[1][2])
+        for (kind, editor, detail), (attempts, hits, seconds) in \
+                ranked[:limit]:
+            where = ' '.join(part for part in (kind, editor, detail) if part)
+            lines.append("%9.4f %6.1f %10d %10d %6.1f  %s" % (
+                seconds, 100.0 * seconds / total, attempts, hits,
+                100.0 * hits / attempts if attempts else 0.0, where))
+        return '\n'.join(lines) + '\n'
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+"""
+Base stream editor.
+
+A `StreamEditor` subclass declares a `table` -- a list of states, each a list
+of `[regex, action]` transitions -- and implements `apply_match`. The editor
+scans its lines once, collecting every completed match, then hands the
+matches to `apply_match` in reverse order so that edits made near the end of
+the file do not disturb the line numbers of earlier matches.
+
+Loading and saving are kept separate from matching (`run` vs `transform`) so
+that several editors can be run over one in-memory line list. The lines
+live in a `FileState`, which chained editors share along with its indexes.
+"""
+from sed.engine import (
+    ACCEPT, REJECT, NEXT, REPEAT,
+    ANY
+)
+
+from src.common.edits import EditLog
+from src.common.file_state import FILES, FileState
+from src.common.line_index import LineIndex
+from src.common.match_record import MatchRecord
+from src.common.prefilter import compile_table
+
+
+def read_text(filename):
+    with open(filename) as f:
+        return f.read()
+
+
+def write_text(filename, text):
+    with open(filename, 'w') as f:
+        f.write(text)
+
+
+def split_lines(text):
+    """ Split `text` into lines without line terminators """
+    lines = text.split('\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    return lines
+
+
+def join_lines(lines):
+    return '\n'.join(lines) + '\n'
+
+
+def read_lines(filename):
+    """ Read `filename` as a list of lines without line terminators """
+    return split_lines(read_text(filename))
+
+
+def write_lines(filename, lines):
+    """ Write `lines` to `filename`, one per line """
+    write_text(filename, join_lines(lines))
+
+
+def match_line(regex, line):
+    """
+    Return the groupdict of `regex` against `line`, or None.
+    `ANY` matches every line and captures nothing.
+    """
+    if regex is ANY:
+        return {}
+    m = regex.match(line)
+    return m.groupdict() if m else None
+
+
+class TableMatcher(object):
+    """
+    Incremental driver for a transition table. Lines are fed one at a time;
+    `feed` returns a completed match (a dict with keys "start", "end" and
+    "matches", a list of one `MatchRecord` per matched line) when a
+    transition ACCEPTs. A match still open when input runs
+    out is returned by `finish` with "end" set to None.
+
+    When `keywords` is given, lines containing none of them are skipped
+    while the table is in its first state. With a `profiler`, every regex
+    attempt is counted and timed against `editor_class`.
+    """
+    def __init__(self, table, keywords=None, profiler=None, editor_class=None):
+        self.table = table
+        self.rows = compile_table(table)
+        if profiler is not None:
+            self.rows = profiler.instrument_rows(editor_class, self.rows)
+        self.keywords = keywords
+        self.reset()
+
+    def reset(self):
+        self.state = 0
+        self.current = None
+
+    def feed(self, line_no, line):
+        if self.keywords and self.state == 0 and \
+                not any(keyword in line for keyword in self.keywords):
+            return None
+        prefilter, row = self.rows[self.state]
+        if prefilter is not None and prefilter.match(line) is None:
+            return None
+        for regex, action in row:
+            if regex is ANY:
+                m = None
+            else:
+                m = regex.match(line)
+                if m is None:
+                    continue
+            groups = MatchRecord(m, line_no)
+            current = self.current or \
+                {"start": line_no, "end": None, "matches": []}
+            if callable(action):
+                action = action(current, groups)
+            if action == REJECT:
+                self.reset()
+                return None
+            current["matches"].append(groups)
+            self.current = current
+            if action == ACCEPT:
+                current["end"] = line_no
+                self.reset()
+                return current
+            elif action == NEXT:
+                # NEXT from the last state stays there
+                self.state = min(self.state + 1, len(self.table) - 1)
+            elif action != REPEAT:
+                self.state = action
+            return None
+        # No transition matched: stay in the current state
+        return None
+
+    def finish(self):
+        current = self.current
+        self.reset()
+        return current
+
+
+class StreamEditor(object):
+    """
+    Base class for table-driven line editors.
+
+    `keywords` optionally lists literals, at least one of which appears in
+    every line matched by the first state of `table`; while in that state,
+    lines without any of them are skipped without trying the regexes. A
+    file containing none of them is left alone, so a pipeline can reject it
+    unread. Editors that find their own matches may declare `keywords` for
+    that alone.
+
+    With `batch_edits`, range edits are recorded in an `EditLog` against the
+    original line numbers and applied in one pass after the last match, so
+    `self.lines` does not change while `apply_match` runs.
+
+    `streamable` marks editors whose `apply_match` only reads and edits the
+    lines of its own match; they can be run by `src.common.streaming`
+    without holding the whole file in memory.
+
+    `converges` marks editors that stop changing a file when run over
+    their own output again, such as merges; only chains of them may be run
+    with --fixed-point. Editors that insert lines would insert them again.
+
+    `extensions` lists the file extensions the editor applies to. Other
+    files are not collected when walking a directory, and a pipeline does
+    not hand them to the editor unless told to edit whatever it is given.
+
+    The editor works on a `FileState`: the one it is given, a new one around
+    `lines`, or the state of `filename` in the process-wide `FILES` cache.
+    `self.lines` is the state's lines, so edits are seen by the next editor
+    given the same state.
+
+    `stats` holds counters an editor may keep about its work (name ->
+    count); a run reports their totals. `config` is a dict of settings a
+    tool's `main` passes to its editors through the driver.
+    """
+    table = None
+    keywords = None
+    batch_edits = False
+    streamable = False
+    converges = False
+    extensions = None
+
+    @classmethod
+    def handles(cls, filename):
+        return not cls.extensions or filename.endswith(tuple(cls.extensions))
+
+    def __init__(self, filename, verbose=False, dryrun=False, lines=None,
+                 profiler=None, state=None, config=None):
+        self.filename = filename
+        self.verbose = verbose
+        self.dryrun = dryrun
+        self.profiler = profiler
+        self.config = config or {}
+        if state is None:
+            state = FILES.load(filename) if lines is None \
+                else FileState(filename, lines)
+        self.state = state
+        self.changed = False
+        self.stats = {}
+        self.edit_log = EditLog() if self.batch_edits else None
+        self._entab_width = None
+
+    def apply_match(self, i, dict_matches):
+        raise NotImplementedError
+
+    @property
+    def lines(self):
+        return self.state.lines
+
+    @lines.setter
+    def lines(self, lines):
+        self.state.lines = lines
+
+    def find_matches(self):
+        """ Scan all lines once and return the list of matches """
+        matcher = TableMatcher(self.table, self.keywords, self.profiler,
+                               type(self))
+        found = []
+        lines = self.lines
+        if self.keywords and hasattr(lines, 'scan'):
+            # Mapped lines: only decode the lines the matcher can use
+            scan = lines.scan(self.keywords, lambda: matcher.state == 0)
+        else:
+            scan = enumerate(lines)
+        for line_no, line in scan:
+            dict_matches = matcher.feed(line_no, line)
+            if dict_matches is not None:
+                found.append(dict_matches)
+        dict_matches = matcher.finish()
+        if dict_matches is not None:
+            found.append(dict_matches)
+        return found
+
+    def apply_matches(self, found):
+        if self.profiler is not None:
+            key = ('apply_match', type(self).__name__, '')
+            for i, dict_matches in reversed(list(enumerate(found))):
+                with self.profiler.timer(key):
+                    self.apply_match(i, dict_matches)
+            return
+        for i, dict_matches in reversed(list(enumerate(found))):
+            self.apply_match(i, dict_matches)
+
+    def run(self):
+        """ Match and edit the in-memory lines; return True if changed """
+        self.apply_matches(self.find_matches())
+        self.commit_edits()
+        return self.changed
+
+    def commit_edits(self):
+        """ Apply any batched edits to `self.lines` """
+        if self.edit_log:
+            self.lines = self.edit_log.apply(self.lines)
+            self.edit_log = EditLog()
+            self.state.version += 1
+        if self._entab_width is not None:
+            width, self._entab_width = self._entab_width, None
+            self.entab(width)
+
+    def save(self):
+        FILES.save(self.state)
+
+    def transform(self):
+        """ Run the editor and write the file back if it changed """
+        if self.run():
+            if self.dryrun:
+                # The cached state no longer matches the file
+                FILES.discard(self.filename)
+            else:
+                self.save()
+        return self.changed
+
+    # Queries
+
+    @property
+    def index(self):
+        """ The `LineIndex` of the current lines, built on first use """
+        state = self.state
+        if state.index is None or state.index.lines is not state.lines:
+            state.index = LineIndex(state.lines, match_line)
+        return state.index
+
+    def _first(self, regex):
+        if self.profiler is None:
+            return self.index.first(regex)
+        key = ('find_line', type(self).__name__,
+               self.profiler.name(regex, type(self).__module__))
+        with self.profiler.timer(key):
+            return self.index.first(regex)
+
+    def find_line(self, regex):
+        """ Return (line_no, groupdict) of the first line matching `regex` """
+        line_no = self._first(regex)
+        if line_no is None:
+            return None, None
+        return line_no, match_line(regex, self.lines[line_no])
+
+    def find_any_line(self, regexes):
+        """
+        Return (line_no, groupdict) of the first line matching any regex
+        """
+        found = None, None
+        for regex in regexes:
+            line_no = self._first(regex)
+            if line_no is not None and \
+                    (found[0] is None or line_no < found[0]):
+                found = line_no, match_line(regex, self.lines[line_no])
+        return found
+
+    # Edits
+
+    def _editable(self):
+        """ `self.lines` as a list that can be edited in place """
+        if not isinstance(self.lines, list):
+            self.lines = list(self.lines)
+        return self.lines
+
+    def insert_range(self, line_no, new_lines):
+        """ Insert `new_lines` before `line_no` """
+        self.replace_range((line_no, line_no), new_lines)
+
+    def append_range(self, line_no, new_lines):
+        """ Insert `new_lines` after `line_no` """
+        self.insert_range(line_no + 1, new_lines)
+
+    def replace_range(self, loc, new_lines):
+        """ Replace lines [start, end) with `new_lines` """
+        start, end = loc
+        self.changed = True
+        if self.edit_log is not None:
+            self.edit_log.replace(start, end, new_lines)
+            return
+        self._editable()[start:end] = new_lines
+        self.state.version += 1
+        index = self.state.index
+        # An index left by an earlier editor may be of a replaced list
+        if index is not None and index.lines is self.lines:
+            index.replace(start, end, len(new_lines))
+
+    def delete_range(self, loc):
+        """ Delete lines [start, end], inclusive """
+        start, end = loc
+        self.replace_range((start, end + 1), [])
+
+    def sort_range(self, loc):
+        """ Sort lines [start, end], inclusive """
+        start, end = loc
+        old = self.lines[start:end + 1]
+        new = sorted(old)
+        if new != old:
+            self.replace_range((start, end + 1), new)
+
+    def entab(self, width=4):
+        """ Convert leading spaces to tabs, `width` spaces per tab """
+        if self.edit_log is not None:
+            # Deferred until the batched edits are applied
+            self._entab_width = width
+            return
+        for line_no, line in enumerate(self._editable()):
+            stripped = line.lstrip(' \t')
+            indent = line[:len(line) - len(stripped)]
+            if ' ' not in indent:
+                continue
+            columns = len(indent.expandtabs(width))
+            tabs, spaces = divmod(columns, width)
+            new = '\t' * tabs + ' ' * spaces + stripped
+            if new != line:
+                self.lines[line_no] = new
+                self.changed = True
+                self.state.version += 1
+                if self.state.index is not None:
+                    self.state.index.clear()
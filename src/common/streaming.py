@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Streaming execution for editors whose edits stay inside their own matches.
+
+The file is read one line at a time and lines are written straight to a
+temporary file next to it, except while a match is open: those lines are
+held in a window until the match completes. The completed match is then
+applied by an editor that sees only the window, and the edited window is
+written out. The temporary file replaces the original by an atomic rename,
+and only if something changed, so memory stays proportional to the largest
+match rather than to the file.
+
+Lines are decoded and encoded by the rules of `FileState`: the BOM, a CRLF
+line ending and a missing final newline are kept, and undecodable bytes
+survive, so a streamed file is written byte for byte as it would be by an
+in-memory run. The line ending is found by a first pass over the file's
+bytes, a chunk at a time.
+
+Only editors marked `streamable` may be run this way: `apply_match` must
+not look at, or edit, lines outside the match, and `entab` only reaches the
+lines of the window.
+"""
+import os
+import shutil
+import tempfile
+
+from src.common.file_state import BOM, ENCODING, ERRORS, scan_layout
+from src.common.stream_editor import TableMatcher
+
+
+def rebase(dict_matches, offset):
+    """ Shift the line numbers of `dict_matches` back by `offset` """
+    dict_matches["start"] -= offset
+    if dict_matches["end"] is not None:
+        dict_matches["end"] -= offset
+    for match in dict_matches["matches"]:
+        match.line_no -= offset
+    return dict_matches
+
+
+class StreamingRun(object):
+    def __init__(self, editor_class, filename, verbose=False, dryrun=False,
+                 profiler=None):
+        self.editor_class = editor_class
+        self.filename = filename
+        self.verbose = verbose
+        self.dryrun = dryrun
+        self.profiler = profiler
+        self.changed = False
+
+    def apply(self, window, offset, dict_matches):
+        """ Apply one match to its window and return the edited lines """
+        editor = self.editor_class(self.filename, verbose=self.verbose,
+                                   dryrun=self.dryrun, lines=window,
+                                   profiler=self.profiler)
+        before = list(window)
+        editor.apply_matches([rebase(dict_matches, offset)])
+        editor.commit_edits()
+        # Edits that leave the window as it was are not a change
+        self.changed = editor.lines != before or self.changed
+        return editor.lines
+
+    def run(self, source, out):
+        """
+        Stream the binary file `source` to the binary file `out`; return
+        True if anything changed
+        """
+        encoding, newline, final_newline = scan_layout(source)
+        writer = LineWriter(out, encoding, newline)
+        matcher = TableMatcher(self.editor_class.table,
+                               self.editor_class.keywords, self.profiler,
+                               self.editor_class)
+        window = []
+        offset = 0
+        for line_no, data in enumerate(source):
+            line = data.decode(ENCODING, ERRORS)
+            if line.endswith('\n'):
+                line = line[:-len(newline)]
+            if matcher.current is None and not window:
+                offset = line_no
+            dict_matches = matcher.feed(line_no, line)
+            window.append(line)
+            if dict_matches is not None:
+                window = self.apply(window, offset, dict_matches)
+            elif matcher.current is not None:
+                # Match in flight: hold the window
+                continue
+            writer.write(window)
+            window = []
+        dict_matches = matcher.finish()
+        if dict_matches is not None:
+            window = self.apply(window, offset, dict_matches)
+        writer.write(window)
+        writer.close(final_newline)
+        return self.changed
+
+
+class LineWriter(object):
+    """ Writes lines out as `FileState.encode` would, as they come """
+    def __init__(self, out, encoding, newline):
+        self.out = out
+        self.newline = newline.encode(ENCODING)
+        self.empty = True
+        if encoding == 'utf-8-sig':
+            out.write(BOM)
+
+    def write(self, lines):
+        for line in lines:
+            if not self.empty:
+                self.out.write(self.newline)
+            self.out.write(line.encode(ENCODING, ERRORS))
+            self.empty = False
+
+    def close(self, final_newline):
+        if final_newline and not self.empty:
+            self.out.write(self.newline)
+
+
+def stream_file(editor_class, filename, verbose=False, dryrun=False,
+                profiler=None, fsync=False):
+    """
+    Stream `filename` through `editor_class`, replacing it atomically if it
+    changed. Return True if it changed. With `fsync`, the new contents are
+    on disk before the rename.
+    """
+    path = os.path.realpath(filename)
+    directory, name = os.path.split(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.%s.' % name)
+    try:
+        with open(filename, 'rb') as source, os.fdopen(fd, 'wb') as out:
+            changed = StreamingRun(editor_class, filename, verbose,
+                                   dryrun, profiler).run(source, out)
+            if changed and fsync:
+                out.flush()
+                os.fsync(out.fileno())
+        if changed and not dryrun:
+            shutil.copymode(path, tmp_path)
+            os.rename(tmp_path, path)
+            tmp_path = None
+        return changed
+    finally:
+        if tmp_path is not None:
+            os.remove(tmp_path)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+"""
+Lazy enumeration of the files to edit.
+
+Paths given on the command line may be files, which are yielded as they
+are, or directories, which are walked recursively. While walking, a file is
+yielded if its name matches one of the `include` patterns and neither it
+nor any directory above it matches an `exclude` pattern or, unless turned
+off, a rule from a `.gitignore` on the way down. Files are yielded as the
+walk reaches them, so editing starts before the walk ends.
+
+Patterns are globs as git reads them. A pattern without a slash matches
+the name of a file or directory. A pattern with one matches its path
+below the directory searched (or, in a .gitignore, below the directory
+of the .gitignore), where `*` and `?` do not match a slash and `**`
+matches any number of directories.
+"""
+import functools
+import os
+import re
+
+GITIGNORE = '.gitignore'
+
+
+@functools.lru_cache(maxsize=None)
+def glob_regex(pattern):
+    """ Compile a glob in which only `**` matches across slashes """
+    parts, i, n = [], 0, len(pattern)
+    while i < n:
+        if pattern.startswith('**/', i):
+            parts.append('(?:.*/)?')
+            i += 3
+        elif pattern.startswith('**', i):
+            parts.append('.*')
+            i += 2
+        elif pattern[i] == '*':
+            parts.append('[^/]*')
+            i += 1
+        elif pattern[i] == '?':
+            parts.append('[^/]')
+            i += 1
+        elif pattern[i] == '[':
+            j = i + 1
+            if j < n and pattern[j] in '!^':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            j = pattern.find(']', j)
+            if j < 0:
+                parts.append(re.escape('['))
+                i += 1
+                continue
+            members = pattern[i + 1:j].replace('\\', '\\\\')
+            if members[0] in '!^':
+                members = '^' + members[1:]
+            parts.append('[%s]' % members)
+            i = j + 1
+        else:
+            parts.append(re.escape(pattern[i]))
+            i += 1
+    return re.compile(''.join(parts) + r'\Z')
+
+
+def glob_match(path, pattern):
+    return glob_regex(pattern).match(path) is not None
+
+
+class IgnoreRule(object):
+    """ One line of a .gitignore, relative to the directory it lives in """
+    def __init__(self, base, pattern):
+        self.base = base
+        self.negate = pattern.startswith('!')
+        pattern = pattern.lstrip('!')
+        self.dir_only = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        # A pattern containing a slash is anchored to its directory
+        self.anchored = '/' in pattern
+        self.pattern = pattern.lstrip('/')
+
+    def matches(self, path, is_dir):
+        if self.dir_only and not is_dir:
+            return False
+        if self.anchored:
+            relative = os.path.relpath(path, self.base).replace(os.sep, '/')
+            return glob_match(relative, self.pattern)
+        return glob_match(os.path.basename(path), self.pattern)
+
+
+def read_gitignore(directory):
+    path = os.path.join(directory, GITIGNORE)
+    if not os.path.isfile(path):
+        return []
+    with open(path) as f:
+        lines = (line.strip() for line in f)
+        return [IgnoreRule(directory, line) for line in lines
+                if line and not line.startswith('#')]
+
+
+def is_ignored(rules, path, is_dir):
+    """ The last rule that matches decides, as in git """
+    ignored = False
+    for rule in rules:
+        if rule.matches(path, is_dir):
+            ignored = not rule.negate
+    return ignored
+
+
+def matches_any(relative, patterns):
+    """
+    True if a pattern matches `relative`, a path below the directory
+    searched, or, for patterns without a slash, its last component
+    """
+    name = relative.rsplit('/', 1)[-1]
+    return any(glob_match(relative if '/' in pattern else name,
+                          pattern.lstrip('/'))
+               for pattern in patterns)
+
+
+def walk(top, include, exclude, gitignore):
+    # Rules from the .gitignore files of the directories above `top` are
+    # not consulted; each directory adds its own on the way down.
+    stack = [(top, [])]
+    while stack:
+        directory, rules = stack.pop()
+        if gitignore:
+            rules = rules + read_gitignore(directory)
+        try:
+            names = sorted(os.listdir(directory))
+        except OSError:
+            continue
+        subdirs = []
+        for name in names:
+            path = os.path.join(directory, name)
+            relative = os.path.relpath(path, top).replace(os.sep, '/')
+            is_dir = os.path.isdir(path)
+            if name == '.git' or matches_any(relative, exclude) or \
+                    is_ignored(rules, path, is_dir):
+                continue
+            if is_dir:
+                if not os.path.islink(path):
+                    subdirs.append((path, rules))
+            elif matches_any(relative, include):
+                yield path
+        stack.extend(reversed(subdirs))
+
+
+def iter_files(paths, include=('*',), exclude=(), gitignore=True):
+    """ Yield the files named by, or found under, `paths` """
+    for path in paths:
+        if os.path.isdir(path):
+            for filename in walk(path, include, exclude, gitignore):
+                yield filename
+        else:
+            yield path
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""
+Project-wide index of goog.provide and goog.require.
+
+`GoogIndex.build` reads every file of a tree once and records the names
+each file provides and requires. With it, a require can be checked against
+the whole tree -- a name no file provides is unknown -- without a compiler
+run per file. `used_names` answers the per-file half of the question:
+whether a required name is referenced anywhere outside the goog lines.
+"""
+import hashlib
+import re
+
+from src.common.file_state import FILES
+
+# goog.provide('wgen.assess.Main');
+GOOG_PROVIDE = re.compile(r'''
+    ^
+    goog.provide
+    \(
+    ['"]
+    (?P<class>[\w\d_\$\.]+)
+    ['"]
+    \)
+    ;
+''', re.VERBOSE)
+
+# goog.require('wgen.assess.lib');
+GOOG_REQUIRE = re.compile(r'''
+    ^
+    goog.require
+    \(
+    ['"]
+    (?P<class>[\w\d_\$\.]+)
+    ['"]
+    \)
+    ;
+''', re.VERBOSE)
+
+DOTTED_NAME = re.compile(r'[A-Za-z_$][\w$]*(?:\.[A-Za-z_$][\w$]*)*')
+
+
+def used_names(lines):
+    """
+    Every dotted name referenced in `lines`, with all of its prefixes:
+    `a.b.C.f()` yields a, a.b, a.b.C and a.b.C.f.
+    """
+    names = set()
+    for line in lines:
+        for name in DOTTED_NAME.findall(line):
+            parts = name.split('.')
+            for i in range(1, len(parts) + 1):
+                names.add('.'.join(parts[:i]))
+    return names
+
+
+class GoogIndex(object):
+    def __init__(self):
+        # name -> files providing it
+        self.provides = {}
+        # file -> names it requires
+        self.requires = {}
+
+    def add(self, filename, lines):
+        requires = []
+        for line in lines:
+            if not line.startswith('goog.'):
+                continue
+            m = GOOG_PROVIDE.match(line)
+            if m:
+                self.provides.setdefault(m.group('class'), set()).add(filename)
+                continue
+            m = GOOG_REQUIRE.match(line)
+            if m:
+                requires.append(m.group('class'))
+        if requires:
+            self.requires[filename] = requires
+
+    @classmethod
+    def build(cls, filenames):
+        index = cls()
+        for filename in filenames:
+            index.add(filename, FILES.load(filename).lines)
+        return index
+
+    def is_provided(self, name):
+        return name in self.provides
+
+    @property
+    def cache_key(self):
+        """
+        Changes whenever the set of provided names does, so that a file
+        checked against one tree is checked again against another
+        """
+        digest = hashlib.sha1()
+        for name in sorted(self.provides):
+            digest.update((name + '\n').encode())
+        return digest.hexdigest()
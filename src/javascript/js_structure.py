@@ -0,0 +1,219 @@
+#!/usr/bin/env python
+"""
+Brace structure of a javascript file, from one tokenizing pass.
+
+The line regexes the tools match with (`END_DECL`, `END_VAR_DECL`,
+`INITIALIZE_MATCH`, ...) assume one construct per line and break on compact
+formatting. `JsStructure` tokenizes the file once -- skipping strings,
+template literals, comments and regex literals -- and records every
+`{ ... }` block with its line span, whether it is an object literal, and
+the methods defined in object literals, so that `apply_match` can ask:
+
+    structure.method('initialize')     -> Block of its body, or None
+    structure.enclosing(line_no)       -> innermost block around a line
+    structure.enclosing(line_no, OBJECT)
+    structure.block_at(line_no)        -> first block opened on a line
+
+`JsStructureMixin` gives a `StreamEditor` a `structure` property, kept on
+its `FileState` so that chained editors share it until the lines change.
+Only move-events, extend-decl and inject-delegate-events consult it so
+far; the other javascript editors still find what they need with their
+own line scans.
+"""
+import re
+
+OBJECT, BLOCK = 'object', 'block'
+
+TOKEN = re.compile(r'''
+    (?P<space>\s+)
+    | (?P<comment>//.*)
+    | (?P<open_comment>/\*)
+    | (?P<string>"(?:[^"\\]|\\.)*"? | '(?:[^'\\]|\\.)*'?)
+    | (?P<template>`)
+    | (?P<name>[A-Za-z_$][\w$]*)
+    | (?P<number>\.?\d[\w.]*)
+    | (?P<slash>/=?)
+    | (?P<punct>=>|[{}()\[\];,:?=<>!&|+\-*%^~.@])
+''', re.VERBOSE)
+
+REGEX_BODY = re.compile(r'(?:[^/\\\[\n]|\\.|\[(?:[^\]\\\n]|\\.)*\])*/[a-z]*')
+TEMPLATE_END = re.compile(r'(?:[^`\\]|\\.)*`')
+
+# After these, `/` starts a regex literal rather than a division
+REGEX_KEYWORDS = frozenset(
+    'return typeof instanceof in of new delete void throw case do else'
+    .split())
+# Keywords that take `(...)` before a block, which is not a method
+CONTROL_KEYWORDS = frozenset('if for while switch catch function with'.split())
+# After these, `{` opens an object literal rather than a block
+OBJECT_PRECEDERS = frozenset('= ( [ , : ? => return || && !'.split())
+
+
+class Block(object):
+    """ A `{ ... }` span; `close` is None if the file ends inside it """
+    __slots__ = ('open', 'close', 'kind', 'name', 'key_line')
+
+    def __init__(self, open_line, kind, name=None, key_line=None):
+        self.open = open_line
+        self.close = None
+        self.kind = kind
+        self.name = name
+        self.key_line = open_line if key_line is None else key_line
+
+    def __contains__(self, line_no):
+        return self.open <= line_no and \
+            (self.close is None or line_no <= self.close)
+
+    def __repr__(self):
+        return "Block(%s %s %r %s..%s)" % (self.kind, self.name, self.key_line,
+                                           self.open, self.close)
+
+
+class JsStructure(object):
+    def __init__(self, lines):
+        self.blocks = []
+        self.methods = {}
+        self._scan(lines)
+
+    def method(self, name):
+        """ Body of the first method `name` defined in an object literal """
+        methods = self.methods.get(name)
+        return methods[0] if methods else None
+
+    def enclosing(self, line_no, kind=None):
+        """ Innermost block (of `kind`, if given) containing `line_no` """
+        found = None
+        for block in self.blocks:
+            if block.open > line_no:
+                break
+            if line_no in block and (kind is None or block.kind == kind):
+                found = block
+        return found
+
+    def block_at(self, line_no):
+        """ The first block opened on `line_no` """
+        for block in self.blocks:
+            if block.open == line_no:
+                return block
+            if block.open > line_no:
+                break
+        return None
+
+    def _scan(self, lines):
+        stack = []          # open brackets: (char, Block or None, prev)
+        prev = None         # last significant token
+        key = None          # (name, line) of a `name :` property key
+        pending = None      # (name, key_line) awaiting its function body
+        paren_name = None   # name before the `(...)` just closed
+        state = None        # inside a multi-line comment or template
+        for line_no, line in enumerate(lines):
+            pos, end = 0, len(line)
+            while pos < end:
+                if state == 'comment':
+                    close = line.find('*/', pos)
+                    if close < 0:
+                        break
+                    pos, state = close + 2, None
+                    continue
+                if state == 'template':
+                    m = TEMPLATE_END.match(line, pos)
+                    if not m:
+                        break
+                    pos, state, prev = m.end(), None, 'literal'
+                    continue
+                m = TOKEN.match(line, pos)
+                if not m:
+                    pos += 1
+                    continue
+                kind, text = m.lastgroup, m.group()
+                pos = m.end()
+                if kind in ('space', 'comment'):
+                    continue
+                if kind == 'open_comment':
+                    state = 'comment'
+                    continue
+                if kind == 'template':
+                    state = 'template'
+                    continue
+                if kind == 'slash' and (prev is None or prev in REGEX_KEYWORDS
+                                        or prev in OBJECT_PRECEDERS
+                                        or prev in '{};'):
+                    m = REGEX_BODY.match(line, pos - len(text) + 1)
+                    if m:
+                        pos, prev = m.end(), 'literal'
+                        continue
+                if kind in ('string', 'number'):
+                    prev = 'literal'
+                    block = stack[-1][1] if stack else None
+                    if kind == 'string' and block is not None and \
+                            block.kind == OBJECT:
+                        key = (text.strip('\'"'), line_no)
+                    continue
+                if kind == 'name':
+                    if text == 'function' and prev == ':' and key:
+                        pending = key
+                    elif stack and stack[-1][1] is not None and \
+                            stack[-1][1].kind == OBJECT and prev in ('{', ','):
+                        key = (text, line_no)
+                    prev = text
+                    continue
+                # Punctuation
+                if text in '([':
+                    stack.append((text, None, prev))
+                elif text in ')]':
+                    if stack and stack[-1][0] in '([':
+                        _, _, before = stack.pop()
+                        paren_name = before if text == ')' else None
+                    text = ')' if text == ')' else 'literal'
+                elif text == '{':
+                    block = self._open(line_no, prev, stack, pending,
+                                       paren_name, key)
+                    pending = None
+                    stack.append(('{', block, prev))
+                elif text == '}':
+                    if stack and stack[-1][0] == '{':
+                        stack.pop()[1].close = line_no
+                    text = 'literal'
+                elif text == ',':
+                    key = None
+                prev = text
+                if text != ')':
+                    paren_name = None
+        self.blocks.sort(key=lambda block: block.open)
+
+    def _open(self, line_no, prev, stack, pending, paren_name, key):
+        in_object = bool(stack) and stack[-1][1] is not None and \
+            stack[-1][1].kind == OBJECT
+        if prev is None or prev in OBJECT_PRECEDERS:
+            block = Block(line_no, OBJECT)
+        elif prev == ')' and pending:
+            block = Block(line_no, BLOCK, pending[0], pending[1])
+        elif prev == ')' and in_object and paren_name and key and \
+                paren_name == key[0] and paren_name not in CONTROL_KEYWORDS:
+            # Shorthand method: name(args) { ... }
+            block = Block(line_no, BLOCK, paren_name, key[1])
+        else:
+            block = Block(line_no, BLOCK)
+        if block.name is not None:
+            self.methods.setdefault(block.name, []).append(block)
+        self.blocks.append(block)
+        return block
+
+
+class JsStructureMixin(object):
+    """ Adds a lazily built `structure` to a `StreamEditor` """
+    @property
+    def structure(self):
+        return self.state.derive('js_structure', JsStructure)
+
+    def method_line(self, name, regex=None):
+        """
+        Line opening the body of method `name`, so that code appended after
+        it lands inside the body. Falls back to the first line matching
+        `regex` when the structure has no such method; None if neither
+        finds one or the body does not span lines.
+        """
+        block = self.structure.method(name)
+        if block is None:
+            return self.find_line(regex)[0] if regex is not None else None
+        return block.open if block.close != block.open else None
@@ -1,29 +1,49 @@
 #!/usr/bin/env python
 import re
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
-    call_main,
+    build_parser,
+    option_files,
+    run,
     ACCEPT
 )
 from sed.engine.sed_regex import (
     FUNCTION_HEADER, WGEN_CLASS, WGEN_FUNCTION,
     CONSTRUCTOR_FMT, NAMESPACE_FMT, EXTENDS_FMT
 )
+from src.javascript.symbol_index import SYMBOL_INDEX, SymbolIndex
 
 
-VAR_DECL_FMT = r'''
+# var Base = wgen.assess.common.views.Base;
+VAR_DECL = re.compile(r'''
     ^
     \s*
     var
     \s+
-    %(parent_class)s
+    (?P<parent_class>[\w\d\$\_\.]+)
     \s*
     \=
     \s*
     (?P<expanded_parent_class>[\w\d\$\_\.]+)
     ;
-'''
+''', re.VERBOSE)
+
+
+def find_aliases(lines):
+    """
+    Map each name declared as `var X = a.b.c;` to its expansion, taking the
+    first declaration of a name. Built once per file, so expanding a parent
+    class is a dict lookup rather than a regex compile and file scan.
+    """
+    aliases = {}
+    for line in lines:
+        m = VAR_DECL.match(line)
+        if m:
+            aliases.setdefault(m.group('parent_class'),
+                               m.group('expanded_parent_class'))
+    return aliases
 
 
 # Match all functions in the class
@@ -31,6 +51,9 @@ VAR_DECL_FMT = r'''
 # Prefix function header with a jsdoc block that declares what 'this' is
 # 'this' is discovered by
 class StreamEditorInjectNamespace(StreamEditor):
+    keywords = ('function',)
+    batch_edits = True
+    extensions = ('.js',)
     table = [
         [[FUNCTION_HEADER, ACCEPT], ],
     ]
@@ -39,39 +62,59 @@ class StreamEditorInjectNamespace(StreamEditor):
         start, matches = dict_matches["start"], dict_matches["matches"]
         abc = [WGEN_CLASS, WGEN_FUNCTION]
         namespace_i, ns_matches = self.find_any_line(abc)
+        if namespace_i is not None:
+            namespace = ns_matches['class']
+        else:
+            # No class of its own: use what the tree knows about this file
+            index = self.config.get('symbol_index')
+            namespace = index and index.namespace_of(self.filename)
 
-        if (namespace_i is not None):
+        if namespace:
             for match in matches:
                 args = {
                     'leading_space': match['leading_space'],
-                    'namespace': ns_matches['class'],
+                    'namespace': namespace,
                 }
                 new_decl = [fmt % args for fmt in NAMESPACE_FMT]
                 self.insert_range(start, new_decl)
 
 
 class StreamEditorInjectExtends(StreamEditor):
+    batch_edits = True
+    extensions = ('.js',)
     table = [
         [[WGEN_CLASS, ACCEPT], ],
     ]
 
+    @property
+    def aliases(self):
+        return self.state.derive('aliases', find_aliases)
+
+    def expand(self, parent_class):
+        """
+        The full name of `parent_class`: a local alias first, then the
+        project symbol index, then the name as written
+        """
+        if parent_class in self.aliases:
+            return self.aliases[parent_class]
+        index = self.config.get('symbol_index')
+        if index is not None:
+            return index.resolve(parent_class) or parent_class
+        return parent_class
+
     def apply_match(self, i, dict_matches):
         start, matches = dict_matches["start"], dict_matches["matches"]
         for match in matches:
-            parent_class = match["parent_class"]
-            var_decl = re.compile(VAR_DECL_FMT % locals(), re.VERBOSE)
-            _, var_decl_match = self.find_line(var_decl)
-            expanded_parent_class = \
-                var_decl_match.get('expanded_parent_class') if var_decl_match \
-                else None
             args = {
                 'leading_space': match['leading_space'],
-                'parent_class': expanded_parent_class or parent_class,
+                'parent_class': self.expand(match["parent_class"]),
             }
             self.insert_range(start, [e % args for e in EXTENDS_FMT])
 
 
 class StreamEditorInjectContructor(StreamEditor):
+    batch_edits = True
+    extensions = ('.js',)
     table = [
         [[WGEN_FUNCTION, ACCEPT], ],
     ]
@@ -80,11 +123,38 @@ class StreamEditorInjectContructor(StreamEditor):
         self.insert_range(dict_matches["start"], CONSTRUCTOR_FMT)
 
 
-if __name__ == '__main__':
-    StreamEditors = [
+def add_symbol_index_option(parser):
+    parser.add_argument('--symbol-index', nargs='?', const=SYMBOL_INDEX,
+                        metavar='PATH',
+                        help='resolve parent classes and namespaces across '
+                             'the tree with a persistent index '
+                             '(default: %s)' % SYMBOL_INDEX)
+
+
+def symbol_index_config(options, editor_classes):
+    """ The editors' config for `options`, updating the index if asked """
+    if not options.symbol_index:
+        return {}
+    index = SymbolIndex(options.symbol_index).load()
+    index.update(option_files(editor_classes, options))
+    index.save()
+    return {'symbol_index': index}
+
+
+def main():
+    """ Main entry point """
+    parser = build_parser()
+    add_symbol_index_option(parser)
+    options = parser.parse_args()
+    # One load and one write per file for the whole chain
+    editor_classes = [
         StreamEditorInjectNamespace,
         StreamEditorInjectContructor,
         StreamEditorInjectExtends,
     ]
-    for streamEditor in StreamEditors:
-        call_main(streamEditor)
+    return run(editor_classes, options,
+               config=symbol_index_config(options, editor_classes) or None)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
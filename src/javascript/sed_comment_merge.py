@@ -1,37 +1,72 @@
 #!/usr/bin/env python
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
-    ACCEPT, REJECT, NEXT, REPEAT
+    ACCEPT, NEXT, REPEAT
 )
 from sed.engine.sed_regex import COMMENT_OPEN, COMMENT_CLOSE, BLANK_LINE, ALL
 
 
-# Find consecutive jsdoc comments
+# Find runs of consecutive jsdoc comments
 #   /**
 #   ...
 #    */
 #   /**
 #   ...
 #    */
+#   ...
 # -----
-# delete intermediate end and start
+# delete every intermediate end and start, collapsing the run in one edit
 class StreamEditorCommentMerge(StreamEditor):
+    keywords = ('/**',)
+    batch_edits = True
+    streamable = True
+    converges = True
+    extensions = ('.js',)
     table = [
         [[COMMENT_OPEN, NEXT], ],
         [[COMMENT_CLOSE, NEXT], ],
-        # Allow a new comment or a blank line, but bail otherwise
-        [[COMMENT_OPEN, NEXT], [BLANK_LINE, REPEAT], [ALL, REJECT], ],
-        [[COMMENT_CLOSE, ACCEPT], ],
+        # After a comment: another comment or a blank line continues the
+        # run, anything else ends it
+        [[COMMENT_OPEN, NEXT], [BLANK_LINE, REPEAT], [ALL, ACCEPT], ],
+        [[COMMENT_CLOSE, 2], ],
     ]
 
     def apply_match(self, i, dict_matches):
-        end, matches = dict_matches["end"], dict_matches["matches"]
-        if not (end is None):
-            delete_start = matches[1]['line_no']
-            delete_end = matches[2]['line_no']
-            self.delete_range((delete_start, delete_end))
+        # The match ends on the first line after the run, or is still open
+        # at the end of the file; it holds the open and close of every
+        # comment in the run, with the blank lines between them.
+        lines, matches = self.lines, dict_matches["matches"]
+        if dict_matches["end"] is not None:
+            matches = matches[:-1]
+        opens = [m['line_no'] for m in matches
+                 if COMMENT_OPEN.match(lines[m['line_no']])]
+        closes = [m['line_no'] for m in matches
+                  if COMMENT_CLOSE.match(lines[m['line_no']])]
+        if len(opens) < 2:
+            return
+        # Keep the first open, every comment body and the last close
+        new_lines = lines[opens[0]:closes[0]]
+        for start, end in zip(opens[1:], closes[1:]):
+            new_lines.extend(lines[start + 1:end])
+        new_lines.append(lines[closes[-1]])
+        self.replace_range((opens[0], closes[-1] + 1), new_lines)
+
+        # Merging pairs of comments needs ceil(log2(n)) passes over a run
+        # of n; this merge settles in one
+        saved = (len(opens) - 1).bit_length() - 1
+        self.stats['passes saved'] = max(self.stats.get('passes saved', 0),
+                                         saved)
+        self.stats['comments merged'] = \
+            self.stats.get('comments merged', 0) + len(opens) - 1
+
+
+def main():
+    """ Main entry point """
+    return call_main(StreamEditorCommentMerge)
+
 
 if __name__ == '__main__':
-    call_main(StreamEditorCommentMerge)
+    sys.exit(main())
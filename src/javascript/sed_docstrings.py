@@ -2,8 +2,9 @@
 
 from sys import stderr
 import re
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
     ACCEPT, REJECT, NEXT, REPEAT,
@@ -54,8 +55,8 @@ class StreamEditorDocstring(StreamEditor):
     """
     Implementation-inheritance of apply_match
     """
-    def __init__(self, filename, verbose=False):
-        StreamEditor.__init__(self, filename, verbose)
+    def __init__(self, filename, **kwargs):
+        StreamEditor.__init__(self, filename, **kwargs)
 
     def apply_match(self, i, dict_matches):
         end, matches = dict_matches["end"], dict_matches["matches"][1:]
@@ -64,9 +65,8 @@ class StreamEditorDocstring(StreamEditor):
             replace_end = matches[-1]['line_no']
             fmt = '%(indent)s# %(content)s'
             changes = [(fmt % match).rstrip() for match in matches]
-            if not self.dryrun:
-                self.replace_range((replace_start, replace_end + 1), changes)
-            if self.verbose or self.dryrun:
+            self.replace_range((replace_start, replace_end + 1), changes)
+            if self.verbose:
                 stderr.write("%s\n" % ('-' * 30))
                 stderr.write("(%d %d) %s\n" % \
                              (replace_start, replace_end, self.filename))
@@ -77,30 +77,38 @@ class StreamEditorDocstringMulti(StreamEditorDocstring):
     """
     Stream editor for multi-line docstrings
     """
+    keywords = ('def',)
+    extensions = ('.py',)
     table = [
         [[FN_DECL_FMT, NEXT], ],
         [[DOCSTRING_START, NEXT], [ANY, REJECT], ],
         [[DOCSTRING_END, ACCEPT], [CONTENT, REPEAT], ],
     ]
 
-    def __init__(self, filename, verbose=False):
-        StreamEditorDocstring.__init__(self, filename, verbose)
+    def __init__(self, filename, **kwargs):
+        StreamEditorDocstring.__init__(self, filename, **kwargs)
 
 
 class StreamEditorDocstringSingle(StreamEditorDocstring):
     """
     Stream editor for single line docstrings
     """
+    keywords = ('def',)
+    extensions = ('.py',)
     table = [
         [[FN_DECL_FMT, NEXT], ],
         [[DOCSTRING_FMT, ACCEPT], [ANY, REJECT]],
     ]
 
-    def __init__(self, filename, verbose=False):
-        StreamEditorDocstring.__init__(self, filename, verbose)
+    def __init__(self, filename, **kwargs):
+        StreamEditorDocstring.__init__(self, filename, **kwargs)
 
 
-if __name__ == '__main__':
+def main():
+    """ Main entry point """
     editors = (StreamEditorDocstringSingle, StreamEditorDocstringMulti, )
-    for editor in editors:
-        call_main(editor)
+    return call_main(editors)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
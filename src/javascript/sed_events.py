@@ -1,6 +1,7 @@
 #!/usr/bin/env python
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
     ACCEPT, REJECT, NEXT
@@ -25,6 +26,8 @@ def build_pairs(pairs):
 # -----
 # modify in place
 class StreamEditorModifyEventsWithinMethod(StreamEditor):
+    keywords = ('function',)
+    extensions = ('.js',)
     table = [
         [[FUNCTION_HEADER, NEXT], ],
         [[VAR_DECL, NEXT], [END_DECL, REJECT], ],
@@ -52,5 +55,11 @@ class StreamEditorModifyEventsWithinMethod(StreamEditor):
                 self.replace_range(loc, new_lines)
                 self.entab()
 
+
+def main():
+    """ Main entry point """
+    return call_main(StreamEditorModifyEventsWithinMethod)
+
+
 if __name__ == '__main__':
-    call_main(StreamEditorModifyEventsWithinMethod)
+    sys.exit(main())
@@ -1,13 +1,15 @@
 #!/usr/bin/env python
+import sys
 from sys import stderr
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
     ACCEPT, NEXT, REPEAT
 )
 from sed.engine.sed_regex import END_DECL, EXTEND_DECL, INITIALIZE_MATCH, SELECTOR
 from sed.engine.sed_util import comma_terminate
+from src.javascript.js_structure import JsStructureMixin
 
 
 def build_pairs(pairs):
@@ -30,7 +32,8 @@ def build_newlines(decl, pairs):
 # -----
 # replace original events with only extension of existing events
 # move hard-coded events to initialize
-class StreamEditorExtendEventsDecl(StreamEditor):
+class StreamEditorExtendEventsDecl(JsStructureMixin, StreamEditor):
+    extensions = ('.js',)
     table = [
         [[EXTEND_DECL, NEXT], ],
         [[SELECTOR, REPEAT], [END_DECL, ACCEPT], ],
@@ -46,7 +49,7 @@ class StreamEditorExtendEventsDecl(StreamEditor):
             pairs = [(event["selector"], event["function"]) for event in events]
             new_lines = build_newlines(decl, pairs)
             new_event = "\t\t%s: _.extend(%s)," % (decl, extend)
-            initialize, _ = self.find_line(INITIALIZE_MATCH)
+            initialize = self.method_line('initialize', INITIALIZE_MATCH)
             if initialize is not None:
                 if start < initialize:
                     self.append_range(initialize, new_lines)
@@ -62,5 +65,10 @@ class StreamEditorExtendEventsDecl(StreamEditor):
                          matches)
 
 
+def main():
+    """ Main entry point """
+    return call_main(StreamEditorExtendEventsDecl)
+
+
 if __name__ == '__main__':
-    call_main(StreamEditorExtendEventsDecl)
+    sys.exit(main())
@@ -1,12 +1,17 @@
 #!/usr/bin/env python
 
+import logging
 import re
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
     ACCEPT, NEXT
 )
+from src.javascript.js_structure import JsStructureMixin
+
+LOGGER = logging.getLogger(__name__)
 
 PRIVATE_DELEGATE_EVENTS = '''
         /**
@@ -75,7 +80,9 @@ END_DECL = re.compile(r'''
 ''', re.VERBOSE)
 
 
-class StreamEditorInjectDelegateEvents(StreamEditor):
+class StreamEditorInjectDelegateEvents(JsStructureMixin, StreamEditor):
+    keywords = ('delegateEvents',)
+    extensions = ('.js',)
     table = [
         [[DELEGATE_EVENTS_REGEX, NEXT], ],
         [[END_DECL, ACCEPT], ],
@@ -85,18 +92,32 @@ class StreamEditorInjectDelegateEvents(StreamEditor):
         start, end = dict_matches["start"], dict_matches["end"]
         assert start <= end
 
+        # END_DECL stops at the first `},` inside the method; the brace
+        # structure knows where its body really ends.
+        body = self.structure.block_at(start)
+        if body is not None and body.close is not None:
+            end = body.close
         j, _ = self.find_line(BACKBONE_DELEGATE_EVENTS_REGEX)
         if j is not None:
-            assert start <= j <= end
-            self.replace_range((j, j + 1), [DELEGATE_EVENTS_PATCH])
+            if start <= j <= end:
+                self.replace_range((j, j + 1), [DELEGATE_EVENTS_PATCH])
+            else:
+                LOGGER.warning("%s:%d: delegateEvents call outside the "
+                               "method at lines %d-%d, not patched",
+                               self.filename, j + 1, start + 1, end + 1)
 
         k, _ = self.find_line(PRIVATE_DELEGATE_EVENTS_REGEX)
         if k is None:
             self.insert_range(start, [PRIVATE_DELEGATE_EVENTS])
 
 
-if __name__ == '__main__':
+def main():
+    """ Main entry point """
     #import os.path
     #path = os.path.expandvars(VIEW)
     #call_main([path], StreamEditorInjectDelegateEvents)
-    call_main(StreamEditorInjectDelegateEvents)
+    return call_main(StreamEditorInjectDelegateEvents)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
     ACCEPT
@@ -12,6 +13,10 @@ from sed.engine.sed_regex import FUNCTION_HEADER, PRIVATE_FMT
 # -----
 # Quote the function name of all functions not already quoted
 class StreamEditorInjectPrivate(StreamEditor):
+    keywords = ('function',)
+    batch_edits = True
+    streamable = True
+    extensions = ('.js',)
     table = [
         [[FUNCTION_HEADER, ACCEPT], ],
     ]
@@ -23,5 +28,11 @@ class StreamEditorInjectPrivate(StreamEditor):
                 line_no = match["line_no"]
                 self.insert_range(line_no, [p % match for p in PRIVATE_FMT])
 
+
+def main():
+    """ Main entry point """
+    return call_main(StreamEditorInjectPrivate)
+
+
 if __name__ == '__main__':
-    call_main(StreamEditorInjectPrivate)
+    sys.exit(main())
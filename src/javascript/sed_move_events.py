@@ -1,13 +1,15 @@
 #!/usr/bin/env python
+import sys
 from sys import stderr
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
     ACCEPT, NEXT
 )
 from sed.engine.sed_util import comma_terminate
 from sed.engine.sed_regex import END_DECL, EVENT_DECL, INITIALIZE_MATCH, SELECTOR
+from src.javascript.js_structure import JsStructureMixin
 
 
 def build_pairs(pairs):
@@ -30,7 +32,8 @@ def build_newlines(decl, pairs):
 # -----
 # replace original events with {}
 # move hard-coded events to initialize
-class StreamEditorMoveEvents(StreamEditor):
+class StreamEditorMoveEvents(JsStructureMixin, StreamEditor):
+    extensions = ('.js',)
     table = [
         [[EVENT_DECL, NEXT], ],
         [[SELECTOR, NEXT], [END_DECL, ACCEPT], ],
@@ -45,7 +48,7 @@ class StreamEditorMoveEvents(StreamEditor):
             pairs = [(event["selector"], event["function"]) for event in events]
             new_lines = build_newlines(decl, pairs)
             new_event = "\t\t%s: {}," % decl
-            initialize, _ = self.find_line(INITIALIZE_MATCH)
+            initialize = self.method_line('initialize', INITIALIZE_MATCH)
             if initialize is not None:
                 if start < initialize:
                     self.append_range(initialize, new_lines)
@@ -62,5 +65,10 @@ class StreamEditorMoveEvents(StreamEditor):
                          (self.filename, start), matches)
 
 
+def main():
+    """ Main entry point """
+    return call_main(StreamEditorMoveEvents)
+
+
 if __name__ == '__main__':
-    call_main(StreamEditorMoveEvents)
+    sys.exit(main())
@@ -1,6 +1,7 @@
 #!/usr/bin/env python
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
     ACCEPT
@@ -15,6 +16,9 @@ FMT = """%(leading_space)s'%(function_header)s' : """ \
 # -----
 # Quote the function name of all functions not already quoted
 class StreamEditorQuoteFunctions(StreamEditor):
+    keywords = ('function',)
+    streamable = True
+    extensions = ('.js',)
     table = [
         [[FUNCTION_HEADER, ACCEPT], ],
     ]
@@ -27,5 +31,10 @@ class StreamEditorQuoteFunctions(StreamEditor):
                 self.replace_range((line_no, line_no + 1), [FMT % match])
 
 
+def main():
+    """ Main entry point """
+    return call_main(StreamEditorQuoteFunctions)
+
+
 if __name__ == '__main__':
-    call_main(StreamEditorQuoteFunctions)
+    sys.exit(main())
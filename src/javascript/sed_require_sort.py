@@ -1,28 +1,22 @@
 #!/usr/bin/env python
 
-import re
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
-    call_main,
+    build_parser, run, option_files,
     ACCEPT, REPEAT, NEXT,
     ANY
 )
-
-# goog.require('wgen.assess.lib');
-GOOG_REQUIRE = re.compile(r'''
-    ^
-    goog.require
-    \(
-    ['"]
-    (?P<class>[\w\d_\$\.]+)
-    ['"]
-    \)
-    ;
-''', re.VERBOSE)
+from src.javascript.goog_index import (
+    GOOG_PROVIDE, GOOG_REQUIRE,
+    GoogIndex, used_names
+)
 
 
 class StreamEditorSortGoogRequires(StreamEditor):
+    keywords = ('goog.require',)
+    extensions = ('.js',)
     table = [
         [[GOOG_REQUIRE, NEXT], ],
         [[GOOG_REQUIRE, REPEAT], [ANY, ACCEPT]],
@@ -33,5 +27,138 @@ class StreamEditorSortGoogRequires(StreamEditor):
         if not (end is None):
             self.sort_range((start, end - 1))
 
+
+# Collect every goog.provide and goog.require in the file
+#   goog.provide('wgen.assess.Main');
+#   goog.require('wgen.assess.lib');
+#   ...
+# -----
+# rewrite the first block of them as the sorted, deduplicated provides and
+# requires, and delete the rest
+class StreamEditorNormalizeGoogRequires(StreamEditor):
+    """
+    REPEAT in the first state keeps a single match open over the whole
+    file, so one scan collects every goog line and `apply_match` runs once,
+    on the match left open at the end of the file.
+
+    config:
+      rewrite:    rewrite the goog lines (otherwise only check them)
+      prune:      drop requires whose names the file never uses
+      goog_index: a `GoogIndex` of the tree; requires of names it does not
+                  provide are reported
+    """
+    keywords = ('goog.provide', 'goog.require')
+    batch_edits = True
+    extensions = ('.js',)
+    table = [
+        [[GOOG_PROVIDE, REPEAT], [GOOG_REQUIRE, REPEAT], ],
+    ]
+
+    def apply_match(self, i, dict_matches):
+        lines, matches = self.lines, dict_matches["matches"]
+        goog_lines = [m['line_no'] for m in matches]
+        provides, requires = {}, {}
+        for match in matches:
+            line = lines[match['line_no']].rstrip()
+            found = provides if line.startswith('goog.provide') else requires
+            # The first of duplicate lines is kept
+            found.setdefault(match['class'], (match['line_no'], line))
+        duplicates = len(matches) - len(provides) - len(requires)
+
+        if self.config.get('prune') or self.config.get('goog_index'):
+            skip = set(goog_lines)
+            used = used_names(line for line_no, line in enumerate(lines)
+                              if line_no not in skip)
+            unused = sorted(name for name in requires if name not in used)
+            self.report(requires, unused, 'unused')
+            if self.config.get('prune'):
+                for name in unused:
+                    del requires[name]
+        index = self.config.get('goog_index')
+        if index is not None:
+            unknown = sorted(name for name in requires
+                             if name not in provides and
+                             not index.is_provided(name))
+            self.report(requires, unknown, 'unknown')
+
+        if self.config.get('rewrite', True):
+            self.rewrite(goog_lines, provides, requires)
+            self.count('duplicates removed', duplicates)
+
+    def rewrite(self, goog_lines, provides, requires):
+        lines = self.lines
+        # The header is the first run of goog lines, blank lines allowed
+        start = end = goog_lines[0]
+        for line_no in goog_lines[1:]:
+            if any(lines[j].strip() for j in range(end + 1, line_no)):
+                break
+            end = line_no
+        header = [line for _, (_, line) in sorted(provides.items())]
+        if header and requires:
+            header.append('')
+        header += [line for _, (_, line) in sorted(requires.items())]
+        rest = [line_no for line_no in goog_lines if line_no > end]
+        if header == lines[start:end + 1] and not rest:
+            return
+        self.replace_range((start, end + 1), header)
+        for line_no in rest:
+            self.delete_range((line_no, line_no))
+
+    def report(self, requires, names, problem):
+        for name in names:
+            line_no = requires[name][0]
+            sys.stderr.write("%s:%d: %s goog.require('%s')\n" %
+                             (self.filename, line_no + 1, problem, name))
+        self.count(problem + ' requires', len(names))
+
+    def count(self, key, n):
+        if n:
+            self.stats[key] = self.stats.get(key, 0) + n
+
+
+def add_check_options(parser):
+    parser.add_argument('--check', action='store_true',
+                        help='report requires the file does not use or no '
+                             'file in the tree provides')
+    parser.add_argument('--prune', action='store_true',
+                        help='drop requires the file does not use when '
+                             'normalizing')
+
+
+def normalize_config(options, editor_classes, rewrite=True):
+    """
+    Config of `StreamEditorNormalizeGoogRequires` for `options`, building
+    the goog index of the tree under --check
+    """
+    config = {
+        'rewrite': rewrite,
+        'prune': rewrite and options.prune,
+    }
+    if options.check:
+        # A skipped file would not be reported on
+        options.cache = False
+        config['goog_index'] = GoogIndex.build(
+            option_files(editor_classes, options))
+    return config
+
+
+def main():
+    """ Main entry point """
+    parser = build_parser()
+    parser.add_argument('--normalize', action='store_true',
+                        help='deduplicate and sort every goog.provide and '
+                             'goog.require into one header block')
+    add_check_options(parser)
+    options = parser.parse_args()
+    if options.prune and not options.normalize:
+        parser.error('--prune only applies with --normalize')
+    if not (options.normalize or options.check):
+        return run([StreamEditorSortGoogRequires], options)
+    editor_classes = [StreamEditorNormalizeGoogRequires]
+    return run(editor_classes, options,
+               config=normalize_config(options, editor_classes,
+                                       options.normalize))
+
+
 if __name__ == '__main__':
-    call_main(StreamEditorSortGoogRequires)
+    sys.exit(main())
@@ -1,8 +1,9 @@
 #!/usr/bin/env python
 
 import re
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
     ACCEPT
@@ -28,6 +29,8 @@ BACKBONE_PATCH = [
 
 
 class StreamEditorRevertDelegateEvents(StreamEditor):
+    keywords = ('_delegateEvents',)
+    extensions = ('.js',)
     table = [
         [[PRIVATE_DELEGATE_EVENTS_REGEX, ACCEPT], ],
     ]
@@ -37,8 +40,13 @@ class StreamEditorRevertDelegateEvents(StreamEditor):
         self.entab()
 
 
-if __name__ == '__main__':
+def main():
+    """ Main entry point """
     #import os.path
     #path = os.path.expandvars(VIEW)
     #call_main([path], StreamEditorRevertDelegateEvents)
-    call_main(StreamEditorRevertDelegateEvents)
+    return call_main(StreamEditorRevertDelegateEvents)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,9 @@
 #!/usr/bin/env python
 
 import re
+import sys
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
     call_main,
     ACCEPT, NEXT, REPEAT
@@ -12,7 +13,7 @@ APP_GET = re.compile(r'''
     ^
     (?P<leading_space>\s+)
     (?P<assign>.*)
-    (?P<app_get>self.app.get)
+    (?P<app_get>self\.app\.get)
     (?P<content>.*)
     $
 ''', re.VERBOSE)
@@ -25,13 +26,55 @@ ANY = re.compile(r'''
 ''', re.VERBOSE)
 
 
+# Everything the bracket tracker needs to look at: escapes, quotes,
+# comments and brackets
+BRACKET_TOKEN = re.compile(r'''
+    \\.
+    | """ | \'\'\'
+    | ["'\#()\[\]{}]
+''', re.VERBOSE)
+
+
+class BracketTracker(object):
+    """
+    Running bracket depth over the lines of a call, fed one line at a time.
+    Brackets inside string literals and comments are not counted; triple
+    quoted strings may span lines.
+    """
+    OPEN, CLOSE = '([{', ')]}'
+
+    def __init__(self):
+        self.depth = 0
+        self.quote = None
+
+    def feed(self, text):
+        for m in BRACKET_TOKEN.finditer(text):
+            token = m.group()
+            if self.quote:
+                # '"""' inside a '"' string closes it and opens an empty one
+                if token == self.quote or token == self.quote * 3:
+                    self.quote = None
+            elif token[0] in '\'"':
+                self.quote = token
+            elif token == '#':
+                break
+            elif token in self.OPEN:
+                self.depth += 1
+            elif token in self.CLOSE:
+                self.depth -= 1
+        # Only triple quoted strings continue onto the next line
+        if self.quote and len(self.quote) == 1 and not text.endswith('\\'):
+            self.quote = None
+
+    @property
+    def balanced(self):
+        return not self.depth and not self.quote
+
+
 def test_function(matches, args):
-    result = "".join([m.get('content', "") for m in matches['matches']])
-    result += args['content']
-    parens = result.count('(') - result.count(')')
-    brackets = result.count('[') - result.count(']')
-    braces = result.count('{') - result.count('}')
-    if not sum([parens, brackets, braces]):
+    tracker = matches.setdefault('brackets', BracketTracker())
+    tracker.feed(args['content'])
+    if tracker.balanced:
         return ACCEPT
     elif matches['matches']:
         return REPEAT
@@ -40,6 +83,12 @@ def test_function(matches, args):
 
 
 class StreamEditorRewriteAppGet(StreamEditor):
+    """
+    Not streamable: `entab` re-indents the whole file, which a streamed
+    run would limit to the lines of the match.
+    """
+    keywords = ('self.app.get',)
+    extensions = ('.py',)
     table = [
         [[APP_GET, test_function], ], 
         [[ANY, test_function], ],
@@ -49,7 +98,7 @@ class StreamEditorRewriteAppGet(StreamEditor):
         matches = dict_matches['matches']
         first = matches[0]
         leading = first['leading_space']
-        tabs = len(leading) / 4
+        tabs = len(leading) // 4
         prefix = '\t' * (tabs + 1)
         content = [first['content'][1:]] + [m['content'] for m in matches[1:]]
         result = [leading + first['assign'] + first['app_get'] + '('] + \
@@ -59,5 +108,10 @@ class StreamEditorRewriteAppGet(StreamEditor):
         self.entab()
 
 
+def main():
+    """ Main entry point """
+    return call_main(StreamEditorRewriteAppGet)
+
+
 if __name__ == '__main__':
-    call_main(StreamEditorRewriteAppGet)
+    sys.exit(main())
@@ -0,0 +1,162 @@
+#!/usr/bin/env python
+"""
+Persistent project-wide index of the classes and namespaces declared in a
+javascript tree.
+
+Every `WGEN_CLASS`, `WGEN_FUNCTION` and `goog.provide` declaration is
+recorded by its short name (the last component of the namespace) with the
+fully qualified namespace, file and line. The at-this editors fall back to
+the index when a file does not answer a question by itself: the namespace
+of a parent class known only by its short name, or the namespace of a file
+that declares no class of its own.
+
+The index is kept between runs in a compact tab-separated file:
+
+    # sed-symbols 1
+    F<TAB>path<TAB>mtime_ns<TAB>size
+    <TAB>namespace<TAB>line
+    ...
+
+Each F line is followed by the symbols of that file, which is recorded by
+its absolute path. `update` rescans only the files whose mtime or size
+changed and drops the files that are gone; files indexed by earlier runs
+over other parts of the tree are kept.
+"""
+import hashlib
+import os
+
+from sed.engine.sed_regex import WGEN_CLASS, WGEN_FUNCTION
+
+from src.common.file_state import FILES, file_stamp
+from src.javascript.goog_index import GOOG_PROVIDE
+
+HEADER = '# sed-symbols 1'
+SYMBOL_INDEX = '.sed-symbols'
+
+
+def scan_symbols(lines):
+    """ (namespace, line_no) of every declaration in `lines` """
+    symbols = []
+    for line_no, line in enumerate(lines):
+        for regex in (GOOG_PROVIDE, WGEN_CLASS, WGEN_FUNCTION):
+            m = regex.match(line)
+            if m:
+                symbols.append((m.group('class'), line_no))
+                break
+    return symbols
+
+
+def short_name(namespace):
+    return namespace.rsplit('.', 1)[-1]
+
+
+class SymbolIndex(object):
+    def __init__(self, path=SYMBOL_INDEX):
+        self.path = path
+        # absolute path -> (stamp, [(namespace, line_no), ...])
+        self.files = {}
+        self._names = None
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                lines = f.read().split('\n')
+        except (IOError, OSError):
+            return self
+        if not lines or lines[0] != HEADER:
+            return self
+        symbols = None
+        for line in lines[1:]:
+            fields = line.split('\t')
+            if fields[0] == 'F' and len(fields) == 4:
+                symbols = []
+                stamp = int(fields[2]), int(fields[3])
+                self.files[fields[1]] = (stamp, symbols)
+            elif not fields[0] and len(fields) == 3 and symbols is not None:
+                symbols.append((fields[1], int(fields[2])))
+        return self
+
+    def save(self):
+        lines = [HEADER]
+        for filename, (stamp, symbols) in sorted(self.files.items()):
+            lines.append("F\t%s\t%d\t%d" % (filename, stamp[0], stamp[1]))
+            lines.extend("\t%s\t%d" % symbol for symbol in symbols)
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.rename(tmp_path, self.path)
+
+    def update(self, filenames):
+        """
+        Add `filenames` to the index, rescanning those that changed since
+        they were indexed, and forget indexed files that no longer exist.
+        Files that cannot be read are left out, for the run to report.
+        Return the number rescanned.
+        """
+        for path in [path for path in self.files if not os.path.exists(path)]:
+            del self.files[path]
+        rescanned = 0
+        for filename in filenames:
+            path = os.path.abspath(filename)
+            try:
+                stamp = file_stamp(path)
+                entry = self.files.get(path)
+                if entry is None or entry[0] != stamp:
+                    self.files[path] = stamp, scan_symbols(
+                        FILES.load(filename).lines)
+                    rescanned += 1
+            except OSError:
+                self.files.pop(path, None)
+        self._names = None
+        return rescanned
+
+    @property
+    def names(self):
+        """ short name -> [(namespace, filename, line_no), ...] """
+        if self._names is None:
+            self._names = {}
+            for filename, (_, symbols) in self.files.items():
+                for namespace, line_no in symbols:
+                    self._names.setdefault(short_name(namespace), []).append(
+                        (namespace, filename, line_no))
+        return self._names
+
+    def resolve(self, name):
+        """
+        The namespace declaring `name`, if the tree has exactly one;
+        a name that is already qualified is returned as it is.
+        """
+        if '.' in name:
+            return name
+        namespaces = set(namespace for namespace, _, _ in
+                         self.names.get(name, ()))
+        return namespaces.pop() if len(namespaces) == 1 else None
+
+    def namespace_of(self, filename):
+        """
+        The first namespace declared in `filename`, or None. For a file
+        without a WGEN class or function of its own, this is the namespace
+        of its first goog.provide: nothing is inferred from other files.
+        """
+        entry = self.files.get(os.path.abspath(filename))
+        if entry is None or not entry[1]:
+            return None
+        return entry[1][0][0]
+
+    @property
+    def cache_key(self):
+        """ Changes whenever a resolution could """
+        digest = hashlib.sha1()
+        for filename, (_, symbols) in sorted(self.files.items()):
+            for namespace, line_no in symbols:
+                digest.update(("%s\t%s\n" % (filename, namespace)).encode())
+        return digest.hexdigest()
+
+    def __getstate__(self):
+        # Rebuilt on demand in each worker rather than pickled
+        state = dict(self.__dict__)
+        state['_names'] = None
+        return state
@@ -6,14 +6,14 @@ inject decorators at the head of function definitions.
 """
 import sys
 import re
-from operator import itemgetter
 import logging
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
-    call_main,
+    build_parser, run,
     REPEAT, NEXT
 )
+from src.python.python_ast import PythonSource
 
 REG_IMPORT = re.compile(r"""
     ^import\s+
@@ -55,6 +55,9 @@ class StreamEditorInsertDebugAfterDef(StreamEditor):
     Implement class for inserting debugging statements into a python file.
     (Reimplemented to use decorators on methods.)
     """
+    keywords = ('import', 'def')
+    batch_edits = True
+    extensions = ('.py',)
     table = [
         [[FROM_IMPORT, REPEAT], [REG_IMPORT, REPEAT], [DEF_FUNC, NEXT], ],
         [[DEF_FUNC, REPEAT], ],
@@ -83,7 +86,9 @@ class StreamEditorInsertDebugAfterDef(StreamEditor):
         fns = [match for match in matches if match.get('func_name')]
         imports = [match for match in matches if match.get("library")]
 
-        for match in sorted(fns, key=itemgetter('line_no'), reverse=True):
+        # Edits are batched against the original line numbers, so the
+        # matches can be applied in any order.
+        for match in fns:
             # {'func_name': '__init__', 'line_no': 41, 'indent': '    '}
             LOGGER.debug(match)
             match_line = match["line_no"]
@@ -91,15 +96,62 @@ class StreamEditorInsertDebugAfterDef(StreamEditor):
                 insert_str = "{0[indent]}@func_inspect".format(match)
                 self.insert_range(match_line, [insert_str])
 
-        # If you do this first, then all the lines will be off in
-        # the function-name matches above.
         import_line = max(imp["line_no"] for imp in imports)
         insert_str = "from MMApp.decorators import func_inspect"
         self.append_range(import_line, [insert_str])
 
+
+# Decorators that leave a function without the attributes func_inspect needs
+UNDECORATABLE = frozenset(("staticmethod", "classmethod", "abstractmethod"))
+
+
+class StreamEditorAstInsertDebugAfterDef(StreamEditor):
+    """
+    Same edit as `StreamEditorInsertDebugAfterDef`, with the functions and
+    the import point found by one `ast` pass instead of line regexes.
+    Handles multi-line imports, async defs and stacked decorators.
+    """
+    keywords = ('def',)
+    batch_edits = True
+    extensions = ('.py',)
+
+    def find_matches(self):
+        try:
+            source = PythonSource(self.lines)
+        except (SyntaxError, ValueError) as e:
+            LOGGER.warning("%s: cannot parse, skipped: %s", self.filename, e)
+            return []
+        fns = source.functions()
+        if not fns:
+            return []
+        return [{
+            "start": fns[0]["line_no"],
+            "end": None,
+            "matches": fns,
+            "import_point": source.import_point(),
+        }]
+
+    def apply_match(self, _, dict_matches):
+        """
+        Decorate every function that can be, and import the decorator.
+        """
+        for match in dict_matches["matches"]:
+            if not UNDECORATABLE.intersection(match["decorators"]):
+                insert_str = "{0[indent]}@func_inspect".format(match)
+                self.insert_range(match["line_no"], [insert_str])
+        insert_str = "from MMApp.decorators import func_inspect"
+        self.insert_range(dict_matches["import_point"], [insert_str])
+
+
 def main():
     """ Main entry point"""
-    return call_main(StreamEditorInsertDebugAfterDef)
+    parser = build_parser()
+    parser.add_argument('--ast', action='store_true',
+                        help='find functions with one ast pass per file')
+    options = parser.parse_args()
+    if options.ast:
+        return run([StreamEditorAstInsertDebugAfterDef], options)
+    return run([StreamEditorInsertDebugAfterDef], options)
 
 
 if __name__ == '__main__':
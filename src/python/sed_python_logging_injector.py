@@ -8,12 +8,13 @@ import sys
 import re
 import logging
 
-from sed.engine import (
+from src.common import (
     StreamEditor,
-    call_main,
+    build_parser, run,
     REPEAT, NEXT, ACCEPT,
     ANY,
 )
+from src.python.python_ast import PythonSource
 
 REG_IMPORT = re.compile(r"""
     ^import\s+
@@ -49,6 +50,8 @@ class StreamEditorInjectLogging(StreamEditor):
     """
     Implement class for inserting logging imports into a python file.
     """
+    keywords = ('import',)
+    extensions = ('.py',)
     table = [
         [[FROM_IMPORT, NEXT], [REG_IMPORT, NEXT], ],
         [[FROM_IMPORT, REPEAT], [REG_IMPORT, REPEAT], [ANY, ACCEPT], ],
@@ -70,13 +73,49 @@ class StreamEditorInjectLogging(StreamEditor):
         if not any(m['library'] == 'logging' for m in libraries):
             match = libraries[-1]
             match_line = match["line_no"]
-            insert_str = "import logging\n\nlogger = logging.getLogger(__name__)"
+            insert_str = ("import logging\n\n"
+                          "logger = logging.getLogger(__name__)")
             self.insert_range(match_line, [insert_str])
 
 
+class StreamEditorAstInjectLogging(StreamEditor):
+    """
+    Same edit as `StreamEditorInjectLogging`, with the imports found by one
+    `ast` pass. Handles multi-line imports and files without any imports,
+    and adds the logger after the last import rather than before it.
+    """
+    extensions = ('.py',)
+
+    def find_matches(self):
+        try:
+            source = PythonSource(self.lines)
+        except (SyntaxError, ValueError) as e:
+            LOGGER.warning("%s: cannot parse, skipped: %s", self.filename, e)
+            return []
+        imports = source.imports()
+        if any(m['library'] == 'logging' for m in imports):
+            return []
+        point = source.import_point()
+        return [{"start": point, "end": None, "matches": imports}]
+
+    def apply_match(self, _, dict_matches):
+        """
+        Add `import logging` and a module logger.
+        """
+        insert_str = ("import logging\n\n"
+                      "logger = logging.getLogger(__name__)")
+        self.insert_range(dict_matches["start"], [insert_str])
+
+
 def main():
     """ Main entry point"""
-    return call_main(StreamEditorInjectLogging)
+    parser = build_parser()
+    parser.add_argument('--ast', action='store_true',
+                        help='find imports with one ast pass per file')
+    options = parser.parse_args()
+    if options.ast:
+        return run([StreamEditorAstInjectLogging], options)
+    return run([StreamEditorInjectLogging], options)
 
 
 if __name__ == '__main__':
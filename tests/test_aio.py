@@ -0,0 +1,83 @@
+import re
+import threading
+import time
+
+import pytest
+
+from src.common import ACCEPT, StreamEditor
+from src.common import aio
+from src.common.pipeline import StreamEditorPipeline
+
+FOO = re.compile(r'^foo')
+
+
+class InsertBar(StreamEditor):
+    keywords = ('foo',)
+    extensions = ('.js',)
+    table = [[[FOO, ACCEPT], ], ]
+
+    def apply_match(self, i, dict_matches):
+        self.insert_range(dict_matches["start"], ['bar'])
+
+
+def make_files(tmp_path, n):
+    paths = []
+    for i in range(n):
+        path = tmp_path / ('f%02d.js' % i)
+        path.write_text('foo\n' if i % 2 else 'nothing\n')
+        paths.append(str(path))
+    return paths
+
+
+def test_files_are_edited_and_reported(tmp_path):
+    paths = make_files(tmp_path, 6)
+    results = []
+    aio.run_async(StreamEditorPipeline([InsertBar]), paths, 1, None, 3,
+                  results.append)
+    assert sorted(r['filename'] for r in results) == paths
+    assert sorted(r['filename'] for r in results
+                  if r['changed']) == paths[1::2]
+    assert all(r['error'] is None for r in results)
+    for i, path in enumerate(paths):
+        with open(path) as f:
+            assert f.read() == ('bar\nfoo\n' if i % 2 else 'nothing\n')
+
+
+def test_unreadable_files_are_reported_as_errors(tmp_path):
+    missing = str(tmp_path / 'missing.js')
+    results = []
+    aio.run_async(StreamEditorPipeline([InsertBar]), [missing], 1, None, 2,
+                  results.append)
+    assert [r['filename'] for r in results] == [missing]
+    assert 'FileNotFoundError' in results[0]['error']
+
+
+@pytest.mark.parametrize('diff', [False, True])
+def test_window_bounds_files_held(tmp_path, monkeypatch, diff):
+    paths = make_files(tmp_path, 8)
+    lock = threading.Lock()
+    held = set()
+    most = []
+    read_data = aio.read_data
+
+    def slow_read(filename):
+        with lock:
+            held.add(filename)
+            most.append(len(held))
+        # The first file finishes last, so later results wait on it
+        time.sleep(0.2 if filename == paths[0] else 0.01)
+        return read_data(filename)
+
+    def report(result):
+        with lock:
+            held.discard(result['filename'])
+        results.append(result['filename'])
+
+    results = []
+    monkeypatch.setattr(aio, 'read_data', slow_read)
+    aio.run_async(StreamEditorPipeline([InsertBar], diff=diff), paths, 1,
+                  None, 3, report)
+    assert max(most) <= 3
+    assert sorted(results) == paths
+    if diff:
+        assert results == paths
@@ -0,0 +1,69 @@
+from src.common.cache import (
+    ResultCache, content_digest, editor_key, source_digest
+)
+
+
+class EditorA(object):
+    pass
+
+
+class EditorB(object):
+    pass
+
+
+def test_miss_then_hit_after_save(tmp_path):
+    cache = ResultCache([EditorA], str(tmp_path)).load()
+    digest = content_digest('x = 1\n')
+    assert not cache.is_noop(digest)
+    cache.record(digest, digest)
+    cache.save()
+    assert ResultCache([EditorA], str(tmp_path)).load().is_noop(digest)
+
+
+def test_changed_file_output_is_a_noop_only_once_settled(tmp_path):
+    before, after = content_digest('a\n'), content_digest('b\n')
+    cache = ResultCache([EditorA], str(tmp_path)).load()
+    cache.record(before, after)
+    cache.save()
+    cache = ResultCache([EditorA], str(tmp_path)).load()
+    assert not cache.is_noop(before)
+    assert not cache.is_noop(after)
+    cache.record(before, after, settled=True)
+    cache.save()
+    assert ResultCache([EditorA], str(tmp_path)).load().is_noop(after)
+
+
+def test_source_digest_covers_imported_engine_modules(tmp_path, monkeypatch):
+    from src.python import python_ast
+    from src.python.sed_python_func_debug import (
+        StreamEditorAstInsertDebugAfterDef
+    )
+    copy = tmp_path / 'python_ast.py'
+    copy.write_text('# one\n')
+    monkeypatch.setattr(python_ast, '__file__', str(copy))
+    before = source_digest([StreamEditorAstInsertDebugAfterDef])
+    copy.write_text('# two\n')
+    assert source_digest([StreamEditorAstInsertDebugAfterDef]) != before
+
+
+def test_chain_and_config_key_the_cache(tmp_path):
+    digest = content_digest('x\n')
+    cache = ResultCache([EditorA], str(tmp_path), {'rewrite': True}).load()
+    cache.record(digest, digest)
+    cache.save()
+    assert not ResultCache([EditorB], str(tmp_path)).load().is_noop(digest)
+    assert not ResultCache([EditorA], str(tmp_path),
+                           {'rewrite': False}).load().is_noop(digest)
+    assert ResultCache([EditorA], str(tmp_path),
+                       {'rewrite': True}).load().is_noop(digest)
+
+
+def test_config_values_key_on_cache_key():
+    class Index(object):
+        def __init__(self, cache_key):
+            self.cache_key = cache_key
+
+    assert editor_key([EditorA], {'index': Index('1')}) == \
+        editor_key([EditorA], {'index': Index('1')})
+    assert editor_key([EditorA], {'index': Index('1')}) != \
+        editor_key([EditorA], {'index': Index('2')})
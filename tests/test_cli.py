@@ -0,0 +1,61 @@
+import pytest
+
+from src.cli import main
+from src.common.file_state import FILES
+
+REQUIRES = """\
+goog.provide('app.Main');
+
+goog.require('app.b');
+goog.require('app.a');
+
+var x = app.a.f();
+"""
+
+
+@pytest.fixture(autouse=True)
+def clear_files():
+    yield
+    FILES.clear()
+
+
+def test_list(capsys):
+    assert main(['list']) == 0
+    assert 'require-normalize' in capsys.readouterr().out.split()
+
+
+def test_unknown_tool(capsys):
+    assert main(['run', 'nope', '.']) == 2
+    assert 'unknown tools: nope' in capsys.readouterr().err
+
+
+def test_tool_options_reach_their_tool(tmp_path, capsys):
+    path = tmp_path / 'main.js'
+    path.write_text(REQUIRES)
+    assert main(['run', 'require-sort,require-normalize', '-j', '1',
+                 '--check', '--prune', str(tmp_path)]) == 0
+    assert path.read_text() == """\
+goog.provide('app.Main');
+
+goog.require('app.a');
+
+var x = app.a.f();
+"""
+    err = capsys.readouterr().err
+    assert "unused goog.require('app.b')" in err
+    assert "unknown goog.require('app.a')" in err
+
+
+def test_symbol_index_option(tmp_path):
+    (tmp_path / 'a.js').write_text('var x = 1;\n')
+    index = tmp_path / 'symbols'
+    assert main(['run', 'at-this', '-j', '1', '--symbol-index', str(index),
+                 str(tmp_path)]) == 0
+    assert index.read_text().startswith('# sed-symbols 1\n')
+
+
+def test_options_of_tools_not_named_are_rejected(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main(['run', 'require-sort', '--check', str(tmp_path)])
+    assert exc.value.code == 2
+    assert '--check' in capsys.readouterr().err
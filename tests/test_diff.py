@@ -0,0 +1,85 @@
+import os
+import re
+import subprocess
+
+import pytest
+
+from src.common import ACCEPT, StreamEditor
+from src.common.diff import diff_path
+from src.common.driver import build_parser, run
+from src.common.file_state import BOM, FILES
+
+FOO = re.compile(r'^foo')
+
+SAMPLES = [
+    b'x\nfoo\ny\n',
+    b'x\nfoo',
+    b'x\r\nfoo\r\ny\r\n',
+    b'x\r\nfoo',
+    b'x\r\nfoo\ny\r\n',
+    BOM + b'foo\r\nx\r\n',
+    b'caf\xc3\xa9 \xff\nfoo\n',
+]
+
+
+class RenameFoo(StreamEditor):
+    keywords = ('foo',)
+    table = [[[FOO, ACCEPT], ], ]
+
+    def apply_match(self, i, dict_matches):
+        start = dict_matches["start"]
+        self.replace_range((start, start + 1), ['baz'])
+
+
+class InsertBar(RenameFoo):
+    def apply_match(self, i, dict_matches):
+        self.insert_range(dict_matches["start"] + 1, ['bar'])
+
+
+def git(directory, *args, **kwargs):
+    return subprocess.run(('git',) + args, cwd=str(directory), check=True,
+                          capture_output=True, **kwargs)
+
+
+@pytest.mark.parametrize('editor_class', [RenameFoo, InsertBar])
+@pytest.mark.parametrize('data', SAMPLES)
+def test_git_applies_the_diff(tmp_path, monkeypatch, capsysbinary,
+                              editor_class, data):
+    git(tmp_path, 'init', '-q')
+    path = tmp_path / 'a.js'
+    path.write_bytes(data)
+    monkeypatch.chdir(tmp_path)
+    options = build_parser().parse_args(['-j', '1', '--diff', 'a.js'])
+    assert run([editor_class], options) == 0
+    patch = capsysbinary.readouterr().out
+    assert patch.startswith(b'--- a/a.js\n+++ b/a.js\n')
+    assert path.read_bytes() == data
+    git(tmp_path, 'apply', '--check', input=patch)
+    git(tmp_path, 'apply', input=patch)
+    patched = path.read_bytes()
+    path.write_bytes(data)
+    FILES.clear()
+    assert run([editor_class], build_parser().parse_args(
+        ['-j', '1', 'a.js'])) == 0
+    assert path.read_bytes() == patched
+    capsysbinary.readouterr()
+    FILES.clear()
+
+
+def test_no_newline_marker(tmp_path, monkeypatch, capsysbinary):
+    (tmp_path / 'a.js').write_bytes(b'x\nfoo')
+    monkeypatch.chdir(tmp_path)
+    run([RenameFoo], build_parser().parse_args(['-j', '1', '--diff',
+                                                'a.js']))
+    assert capsysbinary.readouterr().out.endswith(
+        b'-foo\n\\ No newline at end of file\n'
+        b'+baz\n\\ No newline at end of file\n')
+    FILES.clear()
+
+
+def test_diff_path(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert diff_path('sub/a.js') == 'sub/a.js'
+    assert diff_path(str(tmp_path / 'a.js')) == 'a.js'
+    outside = os.path.join(os.path.dirname(str(tmp_path)), 'b.js')
+    assert diff_path(outside) == outside.lstrip('/')
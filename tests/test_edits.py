@@ -0,0 +1,41 @@
+import pytest
+
+from src.common.edits import EditLog
+
+
+def test_edits_apply_against_original_line_numbers():
+    lines = ['a', 'b', 'c', 'd']
+    log = EditLog()
+    log.replace(3, 4, ['D'])
+    log.replace(0, 1, ['A1', 'A2'])
+    log.replace(2, 2, ['x'])
+    assert log.apply(lines) == ['A1', 'A2', 'b', 'x', 'c', 'D']
+    assert lines == ['a', 'b', 'c', 'd']
+
+
+def test_insertions_at_one_line_come_out_in_reverse_before_a_replacement():
+    log = EditLog()
+    log.replace(1, 2, ['B'])
+    log.replace(1, 1, ['first'])
+    log.replace(1, 1, ['second'])
+    assert log.apply(['a', 'b', 'c']) == ['a', 'second', 'first', 'B', 'c']
+
+
+def test_recording_order_matches_immediate_edits_last_match_first():
+    # apply_match runs last match first, so immediate edits never shift
+    # the line numbers of the edits still to come
+    edits = [(2, 3, ['C1', 'C2']), (1, 1, ['ins']), (0, 1, [])]
+    immediate = ['a', 'b', 'c', 'd']
+    log = EditLog()
+    for start, end, new_lines in edits:
+        immediate[start:end] = new_lines
+        log.replace(start, end, new_lines)
+    assert log.apply(['a', 'b', 'c', 'd']) == immediate
+
+
+def test_overlapping_replacements_raise():
+    log = EditLog()
+    log.replace(0, 2, ['x'])
+    log.replace(1, 3, ['y'])
+    with pytest.raises(ValueError):
+        log.apply(['a', 'b', 'c'])
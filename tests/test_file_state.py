@@ -0,0 +1,85 @@
+import pytest
+
+from src.common.file_state import BOM, FILES, FileCache, FileState
+from src.common.mapped import map_file
+
+SAMPLES = [
+    b'a\nb\n',
+    b'a\nb',
+    b'a\r\nb\r\n',
+    b'a\r\nb',
+    b'a\r\nb\nc\r\n',
+    BOM + b'a\r\nb\r\n',
+    b'\n\n',
+    b'\r\n',
+    b'',
+    b'caf\xc3\xa9 \xff\n',
+]
+
+
+@pytest.mark.parametrize('data', SAMPLES)
+def test_decode_encode_round_trip(data):
+    assert FileState.decode('f', data).encode() == data
+
+
+def test_crlf_lines_are_split_and_kept():
+    state = FileState.decode('f', b'a\r\nb\r\n')
+    assert state.lines == ['a', 'b']
+    assert state.newline == '\r\n'
+    state.lines.append('c')
+    assert state.encode() == b'a\r\nb\r\nc\r\n'
+
+
+def test_mixed_line_endings_keep_their_cr():
+    state = FileState.decode('f', b'a\r\nb\n')
+    assert state.lines == ['a\r', 'b']
+
+
+def test_no_final_newline():
+    state = FileState.decode('f', b'a\nb')
+    assert state.lines == ['a', 'b']
+    assert not state.final_newline
+
+
+def test_bom():
+    state = FileState.decode('f', BOM + b'a\n')
+    assert state.lines == ['a']
+    assert state.encode() == BOM + b'a\n'
+
+
+@pytest.mark.parametrize('data', [d for d in SAMPLES if d])
+def test_mapped_lines_match_decoded_lines(tmp_path, data):
+    path = tmp_path / 'f'
+    path.write_bytes(data)
+    mapped = map_file(str(path))
+    decoded = FileState.decode(str(path), data)
+    assert list(mapped.lines) == decoded.lines
+    assert mapped.newline == decoded.newline
+    assert mapped.final_newline == decoded.final_newline
+    assert mapped.encode() == data
+
+
+def test_save_replaces_file_and_keeps_mode(tmp_path):
+    path = tmp_path / 'f.js'
+    path.write_bytes(b'a\r\n')
+    path.chmod(0o754)
+    state = FILES.load(str(path))
+    state.lines.append('b')
+    FILES.save(state)
+    assert path.read_bytes() == b'a\r\nb\r\n'
+    assert path.stat().st_mode & 0o777 == 0o754
+    assert [p.name for p in tmp_path.iterdir()] == ['f.js']
+    FILES.clear()
+
+
+def test_save_keeps_the_cache_size_in_step(tmp_path):
+    path = tmp_path / 'f.js'
+    path.write_bytes(b'x' * 19 + b'\n')
+    cache = FileCache()
+    state = cache.load(str(path))
+    assert cache.size == 20
+    state.lines = ['x' * 199]
+    cache.save(state)
+    assert cache.size == 200
+    cache.discard(str(path))
+    assert cache.size == 0
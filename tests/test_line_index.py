@@ -0,0 +1,41 @@
+import re
+
+from src.common.line_index import LineIndex
+from src.common.stream_editor import match_line
+
+FOO = re.compile(r'^foo')
+BAR = re.compile(r'^bar')
+
+
+def scan(lines, regex):
+    return [line_no for line_no, line in enumerate(lines)
+            if regex.match(line)]
+
+
+def test_lookup_and_first():
+    lines = ['foo', 'x', 'foo', 'bar']
+    index = LineIndex(lines, match_line)
+    assert index.lookup(FOO) == [0, 2]
+    assert index.first(FOO, 1) == 2
+    assert index.first(FOO, 3) is None
+    assert index.first(BAR) == 3
+
+
+def test_replace_keeps_every_regex_current():
+    lines = ['foo', 'x', 'foo', 'bar', 'foo']
+    index = LineIndex(lines, match_line)
+    index.lookup(FOO)
+    index.lookup(BAR)
+    lines[1:3] = ['bar', 'foo', 'y', 'foo']
+    index.replace(1, 3, 4)
+    assert index.lookup(FOO) == scan(lines, FOO)
+    assert index.lookup(BAR) == scan(lines, BAR)
+
+
+def test_replace_with_nothing():
+    lines = ['foo', 'foo', 'x', 'foo']
+    index = LineIndex(lines, match_line)
+    index.lookup(FOO)
+    del lines[0:2]
+    index.replace(0, 2, 0)
+    assert index.lookup(FOO) == scan(lines, FOO) == [1]
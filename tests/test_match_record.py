@@ -0,0 +1,46 @@
+import re
+
+import pytest
+
+from src.common.match_record import MatchRecord
+
+HEADER = re.compile(r'^(?P<leading_space>\s*)(?P<name>\w+)(?P<colon>:)?')
+
+
+def as_dict(line, line_no):
+    groups = HEADER.match(line).groupdict()
+    groups['line_no'] = line_no
+    return groups
+
+
+@pytest.mark.parametrize('line', ['  render: function', 'render'])
+def test_record_reads_like_the_dict_it_replaces(line):
+    record = MatchRecord(HEADER.match(line), 7)
+    expected = as_dict(line, 7)
+    assert dict(record) == expected
+    assert len(record) == len(expected)
+    assert set(record) == set(expected)
+    assert record['colon'] == expected['colon']
+
+
+def test_formatting():
+    record = MatchRecord(HEADER.match('  render:'), 3)
+    assert '%(leading_space)s%(name)s@%(line_no)d' % record == '  render@3'
+    assert '{0[name]}'.format(record) == 'render'
+
+
+def test_missing_keys():
+    record = MatchRecord(HEADER.match('render'), 0)
+    assert 'name' in record
+    assert 'other' not in record
+    assert record.get('other', 'x') == 'x'
+    with pytest.raises(KeyError):
+        record['other']
+
+
+def test_line_matched_by_any_has_only_a_line_number():
+    record = MatchRecord(None, 5)
+    assert dict(record) == {'line_no': 5}
+    assert record.get('name') is None
+    with pytest.raises(KeyError):
+        record['name']
@@ -0,0 +1,121 @@
+import re
+
+from src.common import ACCEPT, StreamEditor
+from src.common.cache import ResultCache, content_digest
+from src.common.driver import build_parser, run
+from src.common.pipeline import (
+    MAX_PASSES, StreamEditorPipeline, new_outcome
+)
+
+FOO = re.compile(r'^foo')
+
+
+class InsertBar(StreamEditor):
+    """ Not idempotent: inserts again on every run """
+    keywords = ('foo',)
+    extensions = ('.js',)
+    table = [[[FOO, ACCEPT], ], ]
+
+    def apply_match(self, i, dict_matches):
+        self.insert_range(dict_matches["start"], ['bar'])
+
+
+class NeverSettles(InsertBar):
+    converges = True
+
+
+class RenameFoo(InsertBar):
+    converges = True
+
+    def apply_match(self, i, dict_matches):
+        start = dict_matches["start"]
+        self.replace_range((start, start + 1), ['baz'])
+
+
+class ReplaceWithItself(InsertBar):
+    def apply_match(self, i, dict_matches):
+        start = dict_matches["start"]
+        self.replace_range((start, start + 1), [self.lines[start]])
+
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def run_tool(editor_classes, *argv):
+    return run(editor_classes, build_parser().parse_args(['-j', '1'] +
+                                                         list(argv)))
+
+
+def test_files_without_keywords_are_not_decoded(tmp_path):
+    path = write(tmp_path / 'a.js', 'nothing here\n')
+    pipeline = StreamEditorPipeline([InsertBar])
+    assert pipeline.acceptor(path)(b'nothing here\n') is False
+    assert pipeline.process(path) == new_outcome()
+
+
+def test_files_with_keywords_are_edited(tmp_path):
+    path = write(tmp_path / 'a.js', 'foo\n')
+    assert StreamEditorPipeline([InsertBar]).process(path)['changed']
+    assert (tmp_path / 'a.js').read_text() == 'bar\nfoo\n'
+
+
+def test_edits_that_cancel_out_leave_the_file_alone(tmp_path):
+    path = write(tmp_path / 'a.js', 'foo\n')
+    mtime = (tmp_path / 'a.js').stat().st_mtime_ns
+    outcome = StreamEditorPipeline([ReplaceWithItself]).process(path)
+    assert not outcome['changed']
+    assert (tmp_path / 'a.js').stat().st_mtime_ns == mtime
+
+
+def test_named_files_are_edited_whatever_their_extension(tmp_path):
+    named = write(tmp_path / 'a.jsx', 'foo\n')
+    write(tmp_path / 'sub.jsx', 'foo\n')
+    assert run_tool([InsertBar], named) == 0
+    assert (tmp_path / 'a.jsx').read_text() == 'bar\nfoo\n'
+    assert run_tool([InsertBar], str(tmp_path)) == 0
+    assert (tmp_path / 'sub.jsx').read_text() == 'foo\n'
+
+
+def test_fixed_point_is_refused_for_editors_that_do_not_converge(
+        tmp_path, capsys):
+    path = write(tmp_path / 'a.js', 'foo\n')
+    assert run_tool([InsertBar], '--fixed-point', path) == 2
+    assert 'InsertBar' in capsys.readouterr().err
+    assert (tmp_path / 'a.js').read_text() == 'foo\n'
+
+
+def test_fixed_point_stops_when_a_pass_changes_nothing(tmp_path, capsys):
+    path = write(tmp_path / 'a.js', 'foo\nfoo\n')
+    assert run_tool([RenameFoo], '--fixed-point', path) == 0
+    assert (tmp_path / 'a.js').read_text() == 'baz\nbaz\n'
+    assert '2 passes, at most 2 on' in capsys.readouterr().err
+
+
+def test_fixed_point_warns_when_a_file_never_settles(tmp_path, capsys):
+    path = write(tmp_path / 'a.js', 'foo\n')
+    assert run_tool([NeverSettles], '--fixed-point', path) == 0
+    err = capsys.readouterr().err
+    assert 'still changing after %d passes' % MAX_PASSES in err
+    lines = (tmp_path / 'a.js').read_text().splitlines()
+    assert lines.count('bar') == MAX_PASSES
+
+
+def test_cache_does_not_skip_output_that_would_change_again(tmp_path):
+    path = write(tmp_path / 'a.js', 'foo\n')
+    cache_dir = str(tmp_path / 'cache')
+    for _ in range(2):
+        assert run_tool([InsertBar], '--cache', '--cache-dir', cache_dir,
+                        path) == 0
+    assert (tmp_path / 'a.js').read_text() == 'bar\nbar\nfoo\n'
+
+
+def test_cache_skips_settled_output(tmp_path):
+    path = write(tmp_path / 'a.js', 'foo\n')
+    cache_dir = str(tmp_path / 'cache')
+    assert run_tool([RenameFoo], '--cache', '--cache-dir', cache_dir,
+                    '--fixed-point', path) == 0
+    assert (tmp_path / 'a.js').read_text() == 'baz\n'
+    cache = ResultCache([RenameFoo], cache_dir).load()
+    assert cache.is_noop(content_digest('baz\n'))
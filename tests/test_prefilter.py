@@ -0,0 +1,63 @@
+import re
+
+from sed.engine import ACCEPT, ANY, NEXT
+
+from src.common.prefilter import combine, compile_table
+from src.common.stream_editor import TableMatcher
+
+FUNCTION = re.compile(r'^\s*(?P<name>\w+)\s*:\s*function')
+METHOD = re.compile(r'^\s*(?P<name>\w+)\s*=\s*function')
+VERBOSE = re.compile(r'''
+    ^def  # a comment that would swallow a closing paren
+    \s+(?P<name>\w+)
+''', re.VERBOSE)
+CLASS = re.compile(r'''
+    ^class  # another comment
+    \s+(?P<name>\w+)
+''', re.VERBOSE)
+
+
+def test_combined_row_matches_what_any_regex_matches():
+    prefilter = combine([FUNCTION, METHOD])
+    lines = ['  render: function() {', '  x = function() {', 'var y = 1;']
+    for line in lines:
+        expected = any(regex.match(line) for regex in (FUNCTION, METHOD))
+        assert bool(prefilter.match(line)) == expected
+
+
+def test_named_groups_are_stripped():
+    prefilter = combine([FUNCTION, METHOD])
+    assert prefilter.groupindex == {}
+
+
+def test_verbose_comments_do_not_swallow_the_alternation():
+    prefilter = combine([VERBOSE, CLASS])
+    assert prefilter.match('def f():')
+    assert prefilter.match('class C:')
+    assert not prefilter.match('import os')
+
+
+def test_uncombinable_rows():
+    assert combine([FUNCTION]) is None
+    assert combine([FUNCTION, ANY]) is None
+    assert combine([FUNCTION, VERBOSE]) is None
+    assert combine([FUNCTION, re.compile(r'(?P<q>")(?P=q)')]) is None
+
+
+def test_tables_are_compiled_once():
+    table = [[[FUNCTION, ACCEPT], [METHOD, ACCEPT]]]
+    assert compile_table(table) is compile_table(table)
+
+
+def test_keywords_skip_lines_only_in_the_first_state():
+    table = [
+        [[FUNCTION, NEXT]],
+        [[re.compile(r'^\s*}'), ACCEPT]],
+    ]
+    matcher = TableMatcher(table, keywords=('function',))
+    lines = ['  render: function() {', '    return 1;', '  }']
+    found = [matcher.feed(line_no, line)
+             for line_no, line in enumerate(lines)]
+    assert found[:2] == [None, None]
+    assert (found[2]['start'], found[2]['end']) == (0, 2)
+    assert matcher.feed(3, '  }') is None
@@ -0,0 +1,75 @@
+from src.common.pipeline import StreamEditorPipeline
+from src.python.python_ast import PythonSource
+from src.python.sed_python_func_debug import (
+    StreamEditorAstInsertDebugAfterDef
+)
+from src.python.sed_python_logging_injector import (
+    StreamEditorAstInjectLogging
+)
+
+SOURCE = '''\
+"""Module."""
+from os.path import (
+    join,
+    split,
+)
+
+
+class C(object):
+    @staticmethod
+    def s():
+        pass
+
+    async def a(self):
+        pass
+'''
+
+
+def edit(tmp_path, editor_class, source):
+    path = tmp_path / 'm.py'
+    path.write_text(source)
+    StreamEditorPipeline([editor_class]).process(str(path))
+    return path.read_text()
+
+
+def test_imports_and_functions():
+    source = PythonSource(SOURCE.splitlines())
+    assert source.imports() == [{'library': 'os.path', 'line_no': 4}]
+    assert source.import_point() == 5
+    assert [(f['func_name'], f['line_no'], f['decorators'], f['is_async'])
+            for f in source.functions()] == [
+        ('s', 9, ['staticmethod'], False),
+        ('a', 12, [], True),
+    ]
+
+
+def test_import_point_after_the_docstring():
+    assert PythonSource(['"""Doc."""', 'x = 1']).import_point() == 1
+
+
+def test_elements_spanning_lines_map_back_to_list_indexes():
+    source = PythonSource(['import a\n\nimport b', 'def f():', '    pass'])
+    assert source.imports()[-1]['line_no'] == 0
+    assert source.functions()[0]['line_no'] == 1
+
+
+def test_func_debug_skips_undecoratable_functions(tmp_path):
+    text = edit(tmp_path, StreamEditorAstInsertDebugAfterDef, SOURCE)
+    assert text.splitlines()[5:8] == [
+        'from MMApp.decorators import func_inspect', '', '']
+    assert '    @func_inspect\n    async def a' in text
+    assert text.count('@func_inspect') == 1
+
+
+def test_logging_goes_after_a_multi_line_import(tmp_path):
+    text = edit(tmp_path, StreamEditorAstInjectLogging, SOURCE)
+    assert text.splitlines()[4:8] == [
+        ')', 'import logging', '', 'logger = logging.getLogger(__name__)']
+    assert edit(tmp_path, StreamEditorAstInjectLogging, text) == text
+
+
+def test_unparsable_files_are_left_alone(tmp_path):
+    for source in ['def f(:\n', 'def f():\n    return "\0"\n']:
+        assert edit(tmp_path, StreamEditorAstInjectLogging, source) == source
+        assert edit(tmp_path, StreamEditorAstInsertDebugAfterDef,
+                    source) == source
@@ -0,0 +1,78 @@
+from src.common.pipeline import StreamEditorPipeline
+from src.javascript.goog_index import GoogIndex, used_names
+from src.javascript.sed_require_sort import (
+    StreamEditorNormalizeGoogRequires
+)
+
+SOURCE = """\
+goog.provide('app.Main');
+goog.require('app.b');
+goog.require('app.a');
+
+var x = app.a.f();
+goog.require('app.b');
+goog.require('app.gone');
+"""
+
+
+def normalize(tmp_path, source=SOURCE, **config):
+    path = tmp_path / 'main.js'
+    path.write_text(source)
+    outcome = StreamEditorPipeline([StreamEditorNormalizeGoogRequires],
+                                   config=config).process(str(path))
+    stats = outcome['stats'].get('StreamEditorNormalizeGoogRequires', {})
+    return path.read_text(), outcome, stats
+
+
+def test_normalize_sorts_and_deduplicates_into_one_header(tmp_path):
+    text, outcome, stats = normalize(tmp_path)
+    assert text == """\
+goog.provide('app.Main');
+
+goog.require('app.a');
+goog.require('app.b');
+goog.require('app.gone');
+
+var x = app.a.f();
+"""
+    assert stats == {'duplicates removed': 1}
+
+
+def test_normalized_file_is_left_alone(tmp_path):
+    text, _, _ = normalize(tmp_path)
+    again, outcome, _ = normalize(tmp_path, text)
+    assert again == text
+    assert not outcome['changed']
+
+
+def test_prune_drops_unused_requires(tmp_path, capsys):
+    text, _, _ = normalize(tmp_path, prune=True)
+    assert "goog.require('app.a');" in text
+    assert 'app.b' not in text and 'app.gone' not in text
+    err = capsys.readouterr().err
+    assert "main.js:2: unused goog.require('app.b')" in err
+
+
+def test_check_reports_without_rewriting(tmp_path, capsys):
+    index = GoogIndex()
+    index.add('a.js', ["goog.provide('app.a');"])
+    index.add('b.js', ["goog.provide('app.b');"])
+    text, outcome, stats = normalize(tmp_path, rewrite=False, goog_index=index)
+    assert text == SOURCE
+    assert not outcome['changed']
+    assert stats == {'unused requires': 2, 'unknown requires': 1}
+    assert "main.js:7: unknown goog.require('app.gone')" in \
+        capsys.readouterr().err
+
+
+def test_used_names_include_prefixes():
+    assert used_names(['a.b.C.f();']) == {'a', 'a.b', 'a.b.C', 'a.b.C.f'}
+
+
+def test_cache_key_follows_provided_names():
+    one, two = GoogIndex(), GoogIndex()
+    one.add('a.js', ["goog.provide('app.a');"])
+    two.add('elsewhere.js', ["goog.provide('app.a');"])
+    assert one.cache_key == two.cache_key
+    two.add('b.js', ["goog.provide('app.b');"])
+    assert one.cache_key != two.cache_key
@@ -0,0 +1,47 @@
+import re
+
+from sed.engine import ACCEPT, NEXT, REPEAT
+
+from src.common.stream_editor import TableMatcher
+
+OPEN = re.compile(r'^open$')
+BODY = re.compile(r'^body$')
+CLOSE = re.compile(r'^close$')
+
+
+def feed_all(matcher, lines):
+    matches = []
+    for line_no, line in enumerate(lines):
+        match = matcher.feed(line_no, line)
+        if match:
+            matches.append(match)
+    return matches
+
+
+def test_accept_completes_a_match():
+    matcher = TableMatcher([
+        [[OPEN, NEXT]],
+        [[BODY, REPEAT], [CLOSE, ACCEPT]],
+    ])
+    matches = feed_all(matcher, ['x', 'open', 'body', 'body', 'close', 'y'])
+    assert [(m['start'], m['end']) for m in matches] == [(1, 4)]
+    assert [g['line_no'] for g in matches[0]['matches']] == [1, 2, 3, 4]
+
+
+def test_next_from_the_last_state_stays_there():
+    matcher = TableMatcher([
+        [[OPEN, NEXT]],
+        [[BODY, NEXT], [CLOSE, ACCEPT]],
+    ])
+    matches = feed_all(matcher, ['open', 'body', 'body', 'close'])
+    assert [(m['start'], m['end']) for m in matches] == [(0, 3)]
+
+
+def test_open_match_is_returned_by_finish():
+    matcher = TableMatcher([
+        [[OPEN, NEXT]],
+        [[CLOSE, ACCEPT]],
+    ])
+    assert feed_all(matcher, ['open', 'body']) == []
+    match = matcher.finish()
+    assert (match['start'], match['end']) == (0, None)
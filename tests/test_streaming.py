@@ -0,0 +1,83 @@
+import io
+import re
+
+import pytest
+
+from src.common import ACCEPT, StreamEditor
+from src.common.file_state import BOM, FILES, FileState, scan_layout
+from src.common.pipeline import StreamEditorPipeline
+from src.common.streaming import stream_file
+
+FOO = re.compile(r'^foo')
+
+SAMPLES = [
+    b'foo\nx\n',
+    b'foo\nx',
+    b'x\r\nfoo\r\n',
+    b'x\r\nfoo',
+    b'foo\r\nx\nfoo\r\n',
+    BOM + b'foo\r\nx\r\n',
+    b'caf\xc3\xa9 \xff\nfoo\n',
+    b'x\n',
+    b'',
+]
+
+
+class InsertBar(StreamEditor):
+    keywords = ('foo',)
+    streamable = True
+    table = [[[FOO, ACCEPT], ], ]
+
+    def apply_match(self, i, dict_matches):
+        self.insert_range(dict_matches["start"], ['bar'])
+
+
+@pytest.mark.parametrize('data', SAMPLES)
+@pytest.mark.parametrize('chunk_size', [1, 2, 4096])
+def test_layout_agrees_with_decode(data, chunk_size):
+    f = io.BytesIO(data)
+    encoding, newline, final_newline = scan_layout(f, chunk_size)
+    state = FileState.decode('f', data)
+    assert (encoding, newline) == (state.encoding, state.newline)
+    if state.lines:
+        assert final_newline == state.final_newline
+    assert f.read() == data[len(BOM) if data.startswith(BOM) else 0:]
+
+
+@pytest.mark.parametrize('data', SAMPLES)
+def test_streamed_file_matches_in_memory_run(tmp_path, data):
+    streamed, loaded = tmp_path / 'streamed.js', tmp_path / 'loaded.js'
+    streamed.write_bytes(data)
+    loaded.write_bytes(data)
+    changed = stream_file(InsertBar, str(streamed))
+    assert changed == (b'foo' in data)
+    StreamEditorPipeline([InsertBar]).process(str(loaded))
+    FILES.clear()
+    assert streamed.read_bytes() == loaded.read_bytes()
+
+
+def test_unchanged_file_is_not_replaced(tmp_path):
+    path = tmp_path / 'a.js'
+    path.write_bytes(b'x\r\ny')
+    inode = path.stat().st_ino
+    assert not stream_file(InsertBar, str(path))
+    assert path.stat().st_ino == inode
+    assert [p.name for p in tmp_path.iterdir()] == ['a.js']
+
+
+def test_rewrite_app_get_entabs_the_whole_file_with_stream(tmp_path):
+    from src.javascript.sed_rewrite_app_get import StreamEditorRewriteAppGet
+    source = (b"class T(object):\n"
+              b"    def test(self):\n"
+              b"        r = self.app.get('/a', params={\n"
+              b"            'x': 1})\n"
+              b"        return r\n")
+    streamed, loaded = tmp_path / 'streamed.py', tmp_path / 'loaded.py'
+    streamed.write_bytes(source)
+    loaded.write_bytes(source)
+    StreamEditorPipeline([StreamEditorRewriteAppGet],
+                         stream=True).process(str(streamed))
+    StreamEditorPipeline([StreamEditorRewriteAppGet]).process(str(loaded))
+    FILES.clear()
+    assert streamed.read_bytes() == loaded.read_bytes()
+    assert streamed.read_bytes().startswith(b"class T(object):\n\tdef")
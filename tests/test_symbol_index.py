@@ -0,0 +1,60 @@
+import os
+
+from src.javascript.symbol_index import SymbolIndex
+
+
+def write(path, text):
+    with open(str(path), 'w') as f:
+        f.write(text)
+    return str(path)
+
+
+def test_resolve_short_names(tmp_path):
+    base = write(tmp_path / 'base.js', "goog.provide('wgen.views.Base');\n")
+    other = write(tmp_path / 'other.js', "goog.provide('wgen.util.Base');\n"
+                                         "goog.provide('wgen.util.Only');\n")
+    index = SymbolIndex(str(tmp_path / '.sed-symbols'))
+    index.update([base])
+    assert index.resolve('Base') == 'wgen.views.Base'
+    index.update([other])
+    # Ambiguous once two namespaces share the short name
+    assert index.resolve('Base') is None
+    assert index.resolve('Only') == 'wgen.util.Only'
+    assert index.resolve('a.b.C') == 'a.b.C'
+    assert index.resolve('Missing') is None
+
+
+def test_partial_update_keeps_the_rest_of_the_tree(tmp_path):
+    base = write(tmp_path / 'base.js', "goog.provide('wgen.views.Base');\n")
+    child = write(tmp_path / 'child.js', "goog.provide('wgen.views.Child');\n")
+    path = str(tmp_path / '.sed-symbols')
+    index = SymbolIndex(path)
+    index.update([base, child])
+    index.save()
+
+    index = SymbolIndex(path).load()
+    assert index.update([child]) == 0
+    index.save()
+    index = SymbolIndex(path).load()
+    assert index.resolve('Base') == 'wgen.views.Base'
+    assert index.namespace_of(child) == 'wgen.views.Child'
+
+
+def test_changed_and_removed_files(tmp_path):
+    base = write(tmp_path / 'base.js', "goog.provide('wgen.views.Base');\n")
+    child = write(tmp_path / 'child.js', "goog.provide('wgen.views.Child');\n")
+    index = SymbolIndex(str(tmp_path / '.sed-symbols'))
+    index.update([base, child])
+    write(tmp_path / 'child.js', "goog.provide('wgen.views.Renamed');\n"
+                                 "// longer\n")
+    os.remove(base)
+    assert index.update([child]) == 1
+    assert index.resolve('Renamed') == 'wgen.views.Renamed'
+    assert index.resolve('Base') is None
+    assert index.namespace_of(base) is None
+
+
+def test_unreadable_files_are_left_out(tmp_path):
+    index = SymbolIndex(str(tmp_path / '.sed-symbols'))
+    assert index.update([str(tmp_path / 'missing.js')]) == 0
+    assert not index.files
@@ -0,0 +1,64 @@
+import os
+
+from src.common.walker import glob_match, iter_files
+
+
+def make_tree(root, paths):
+    for path in paths:
+        path = os.path.join(str(root), path)
+        if not os.path.isdir(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write('x\n')
+
+
+def relative(root, filenames):
+    return sorted(os.path.relpath(f, str(root)).replace(os.sep, '/')
+                  for f in filenames)
+
+
+def test_glob_star_stops_at_slash():
+    assert glob_match('a.js', '*.js')
+    assert not glob_match('a/b.js', '*.js')
+    assert not glob_match('a/b/c.js', 'a/*.js')
+
+
+def test_glob_double_star_spans_directories():
+    assert glob_match('a/c.js', 'a/**/c.js')
+    assert glob_match('a/b/d/c.js', 'a/**/c.js')
+    assert glob_match('a/b/c', 'a/**')
+    assert glob_match('y/z/x', '**/x')
+
+
+def test_include_and_exclude(tmp_path):
+    make_tree(tmp_path, ['a.js', 'a.py', 'lib/b.js', 'lib/vendor/c.js',
+                         'node_modules/d.js'])
+    found = iter_files([str(tmp_path)], include=['*.js'],
+                       exclude=['node_modules'])
+    assert relative(tmp_path, found) == ['a.js', 'lib/b.js',
+                                         'lib/vendor/c.js']
+
+
+def test_patterns_with_a_slash_match_paths(tmp_path):
+    make_tree(tmp_path, ['a.js', 'lib/b.js', 'lib/vendor/c.js'])
+    found = iter_files([str(tmp_path)], include=['lib/*.js'])
+    assert relative(tmp_path, found) == ['lib/b.js']
+    found = iter_files([str(tmp_path)], include=['*.js'],
+                       exclude=['lib/**/c.js'])
+    assert relative(tmp_path, found) == ['a.js', 'lib/b.js']
+
+
+def test_gitignore(tmp_path):
+    make_tree(tmp_path, ['a.js', 'build/b.js', 'lib/c.js', 'lib/keep.js'])
+    with open(os.path.join(str(tmp_path), '.gitignore'), 'w') as f:
+        f.write('build/\nlib/*.js\n!lib/keep.js\n')
+    found = iter_files([str(tmp_path)], include=['*.js'])
+    assert relative(tmp_path, found) == ['a.js', 'lib/keep.js']
+    found = iter_files([str(tmp_path)], include=['*.js'], gitignore=False)
+    assert len(list(found)) == 4
+
+
+def test_named_files_are_yielded_as_given(tmp_path):
+    make_tree(tmp_path, ['script'])
+    path = os.path.join(str(tmp_path), 'script')
+    assert list(iter_files([path], include=['*.py'])) == [path]